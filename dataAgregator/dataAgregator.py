@@ -1,5 +1,49 @@
+import io
 import os
+import sys
+import csv
+import sqlite3
+import datetime
+import numpy as np
 import pandas as pd
+from itertools import repeat
+from functools import partial
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'logUtils'))
+from resultCache import ResultCache
+
+# Folder used to cache the parsed SummaryStats.csv files between runs
+CACHE_FOLDER_NAME = ".summary_cache"
+
+SUMMARY_FILE_NAME = "SummaryStats.csv"
+
+# Folders never searched for SummaryStats.csv files
+SKIPPED_FOLDERS = (CACHE_FOLDER_NAME, ".extract_cache")
+
+# Threads parsing SummaryStats.csv files for the streaming aggregator
+DEFAULT_READ_WORKERS = 4
+
+# SQLite store with one row per (folder, log file, keyword), kept in the main folder
+CAMPAIGN_STORE_NAME = "campaign_store.sqlite"
+
+CAMPAIGN_STORE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS max_elapsed (
+    folder TEXT NOT NULL,
+    log_file TEXT NOT NULL,
+    keyword TEXT NOT NULL,
+    max_elapsed REAL,
+    modified TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_max_elapsed_keyword ON max_elapsed (keyword, folder);
+CREATE INDEX IF NOT EXISTS idx_max_elapsed_folder ON max_elapsed (folder);
+CREATE TABLE IF NOT EXISTS summary_files (
+    folder TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL
+);
+"""
 
 def insert_folder_name_as_header(df, folder_name):
     """
@@ -9,15 +53,19 @@ def insert_folder_name_as_header(df, folder_name):
     df_with_folder = pd.concat([folder_row, df], ignore_index=True)
     return df_with_folder
 
-def process_summary_files(main_folder):
+def process_summary_files(main_folder, use_cache=False):
     """
     Processes all 'SummaryStats.csv' files in subfolders, 
     inserting the folder name above each dataset and combining them into one dataframe.
+    With use_cache=True the parsed files are cached in '.summary_cache' inside the main
+    folder, so a rerun only parses the SummaryStats.csv files that are new or changed.
     """
     all_data = []
+    cache = ResultCache(os.path.join(main_folder, CACHE_FOLDER_NAME), "summary-v1") if use_cache else None
 
     # Traverse through all subdirectories of the main folder
     for subdir, dirs, files in os.walk(main_folder):
+        dirs[:] = [d for d in dirs if d not in SKIPPED_FOLDERS]  # Skip the cache folders
         print(f"Checking folder: {subdir}")  # Debug: Print each folder being checked
         # Look for the SummaryStats.csv file in each subfolder
         for file in files:
@@ -25,8 +73,12 @@ def process_summary_files(main_folder):
                 file_path = os.path.join(subdir, file)
                 print(f"Found file: {file_path}")  # Debug: Print each file found
                 try:
-                    # Read the CSV file
-                    df = pd.read_csv(file_path)
+                    # Read the CSV file (or reuse the cached copy if the file did not change)
+                    df = cache.get(file_path) if cache else None
+                    if df is None:
+                        df = pd.read_csv(file_path)
+                        if cache:
+                            cache.put(file_path, df)
                     if df.empty:
                         print(f"Warning: {file_path} is empty.")  # Warn if the file is empty
                     else:
@@ -47,19 +99,229 @@ def process_summary_files(main_folder):
         print("No SummaryStats.csv files found or all files are empty.")
         return None
 
+def find_summary_files(main_folder):
+    """
+    Yields the path of every SummaryStats.csv below main_folder, in the same order as
+    os.walk, using os.scandir directly (no per-entry stat calls, no lists of all files).
+    """
+    pending = [main_folder]
+    while pending:
+        folder = pending.pop()
+        print(f"Checking folder: {folder}")  # Debug: Print each folder being checked
+        subfolders = []
+        try:
+            with os.scandir(folder) as entries:
+                for entry in entries:
+                    if entry.is_dir():
+                        if entry.name not in SKIPPED_FOLDERS and not entry.is_symlink():
+                            subfolders.append(entry.path)
+                    elif entry.name == SUMMARY_FILE_NAME:
+                        print(f"Found file: {entry.path}")  # Debug: Print each file found
+                        yield entry.path
+        except OSError as e:
+            print(f"Error listing {folder}: {e}")
+        pending.extend(reversed(subfolders))
+
+def read_summary_columns(file_path):
+    """
+    Returns the header of a SummaryStats.csv file, or an empty list if the file has no
+    data rows (such files are skipped, so their columns do not appear in the output).
+    """
+    try:
+        with open(file_path, newline='') as summary_file:
+            reader = csv.reader(summary_file)
+            header = next(reader, [])
+            return header if next(reader, None) is not None else []
+    except OSError:
+        return []
+
+def read_summary_file(file_path, cache=None):
+    """Reads a SummaryStats.csv file, or reuses the cached copy if the file did not change."""
+    df = cache.get(file_path) if cache else None
+    if df is None:
+        df = pd.read_csv(file_path)
+        if cache:
+            cache.put(file_path, df)
+    return df
+
+def submit_in_window(executor, function, items, window):
+    """
+    Yields (item, future) for every item in order, submitting function(item) to the
+    executor at most `window` items ahead of the caller, so the results do not pile up.
+    """
+    items = iter(items)
+    in_flight = deque()
+    for item in items:
+        in_flight.append((item, executor.submit(function, item)))
+        if len(in_flight) == window:
+            break
+    while in_flight:
+        item, future = in_flight.popleft()
+        next_item = next(items, None)
+        if next_item is not None:
+            in_flight.append((next_item, executor.submit(function, next_item)))
+        yield item, future
+
+def format_summary_block(file_path, columns, cache=None):
+    """
+    Reads a SummaryStats.csv file and returns its block of the combined CSV as text:
+    the folder name row, then the file's rows spread over the combined columns.
+    Returns None if the file has no rows.
+    """
+    df = read_summary_file(file_path, cache)
+    if df.empty:
+        return None
+    block = io.StringIO()
+    csv.writer(block, lineterminator=os.linesep).writerow([os.path.basename(os.path.dirname(file_path))] + [''] * (len(columns) - 1))
+    df.reindex(columns=columns).to_csv(block, header=False, index=False)
+    return block.getvalue()
+
+def stream_summary_files(main_folder, output_file, use_cache=False, workers=DEFAULT_READ_WORKERS, summary_files=None):
+    """
+    Streaming version of process_summary_files that writes the same combined CSV to
+    output_file without building it in memory. The files are found with os.scandir and
+    parsed and formatted by a thread pool; each block (folder name row followed by the
+    file's rows) is written as soon as it is its turn, and at most `workers` blocks are
+    held at a time. The header is the union of the columns of all files, read from their
+    first lines beforehand (a file that fails to parse after a valid header therefore
+    still adds its columns). summary_files is the list from find_summary_files, when the
+    caller already has it. Returns the number of blocks written.
+    """
+    cache = ResultCache(os.path.join(main_folder, CACHE_FOLDER_NAME), "summary-v1") if use_cache else None
+    if summary_files is None:
+        summary_files = list(find_summary_files(main_folder))
+
+    # Union of the columns in order of first appearance, as pd.concat would produce
+    columns = list(dict.fromkeys(column for file_path in summary_files for column in read_summary_columns(file_path)))
+    if not columns:
+        print("No SummaryStats.csv files found or all files are empty.")
+        return 0
+
+    blocks_written = 0
+    with open(output_file, 'w', newline='') as out, ThreadPoolExecutor(max_workers=workers) as executor:
+        csv.writer(out, lineterminator=os.linesep).writerow(columns)
+
+        # Keep only a window of files in flight so the parsed blocks do not pile up
+        format_block = partial(format_summary_block, columns=columns, cache=cache)
+        for file_path, future in submit_in_window(executor, format_block, summary_files, workers):
+            try:
+                block = future.result()
+            except Exception as e:
+                print(f"Error reading {file_path}: {e}")  # Catch and print any errors reading the file
+                continue
+            if block is None:
+                print(f"Warning: {file_path} is empty.")  # Warn if the file is empty
+                continue
+            out.write(block)
+            blocks_written += 1
+
+    return blocks_written
+
+def summary_to_long_format(df, folder, modified):
+    """
+    Turns a SummaryStats.csv table (one row per keyword, one column per log file) into
+    (folder, log file, keyword, max elapsed, modified) rows. 'N/A' becomes NULL.
+    """
+    # Column by column (log file outer, keyword inner), the order df.melt would give
+    keywords = df.iloc[:, 0].astype(str).tolist()
+    log_files = df.columns[1:].tolist()
+    max_elapsed = pd.to_numeric(df.iloc[:, 1:].to_numpy(dtype=object).ravel(order='F'), errors='coerce')
+    max_elapsed = np.where(np.isnan(max_elapsed), None, max_elapsed).tolist()
+    return list(zip(repeat(folder), (log_file for log_file in log_files for _ in keywords), keywords * len(log_files),
+                    max_elapsed, repeat(modified)))
+
+def build_campaign_store(main_folder, store_path=None, workers=DEFAULT_READ_WORKERS, summary_files=None):
+    """
+    Loads every SummaryStats.csv below main_folder into a SQLite store in long format:
+    table max_elapsed (folder, log_file, keyword, max_elapsed, modified), indexed on
+    keyword and folder. folder is relative to main_folder and modified is the date the
+    SummaryStats.csv was last written. Reruns only reload new or changed files and drop
+    the rows of folders that no longer have one. summary_files is the list from
+    find_summary_files, when the caller already has it. Returns the store path.
+    """
+    store_path = store_path or os.path.join(main_folder, CAMPAIGN_STORE_NAME)
+    connection = sqlite3.connect(store_path)
+    try:
+        connection.executescript(CAMPAIGN_STORE_SCHEMA)
+        known_files = {folder: (size, mtime_ns) for folder, size, mtime_ns in
+                       connection.execute("SELECT folder, size, mtime_ns FROM summary_files")}
+
+        # Only the files that are new or changed since the last run are parsed again
+        changed_files = []
+        found_folders = set()
+        if summary_files is None:
+            summary_files = find_summary_files(main_folder)
+        for file_path in summary_files:
+            folder = os.path.relpath(os.path.dirname(file_path), main_folder).replace(os.sep, '/')
+            stat = os.stat(file_path)
+            found_folders.add(folder)
+            if known_files.get(folder) != (stat.st_size, stat.st_mtime_ns):
+                changed_files.append((file_path, folder, stat))
+
+        with connection:
+            for folder in set(known_files) - found_folders:
+                connection.execute("DELETE FROM max_elapsed WHERE folder = ?", (folder,))
+                connection.execute("DELETE FROM summary_files WHERE folder = ?", (folder,))
+
+        # One transaction for the whole load: an interrupted run leaves the store as it was
+        with connection, ThreadPoolExecutor(max_workers=workers) as executor:
+            def read_file(changed):
+                return read_summary_file(changed[0])
+
+            for (file_path, folder, stat), future in submit_in_window(executor, read_file, changed_files, workers):
+                connection.execute("DELETE FROM max_elapsed WHERE folder = ?", (folder,))
+                try:
+                    df = future.result()
+                except Exception as e:
+                    print(f"Error reading {file_path}: {e}")  # Its old rows are dropped and it is retried next run
+                    connection.execute("DELETE FROM summary_files WHERE folder = ?", (folder,))
+                    continue
+                if not df.empty:
+                    modified = datetime.datetime.fromtimestamp(stat.st_mtime).isoformat(sep=' ', timespec='seconds')
+                    connection.executemany("INSERT INTO max_elapsed VALUES (?, ?, ?, ?, ?)",
+                                           summary_to_long_format(df, folder, modified))
+                connection.execute("INSERT OR REPLACE INTO summary_files VALUES (?, ?, ?)",
+                                   (folder, stat.st_size, stat.st_mtime_ns))
+    finally:
+        connection.close()
+
+    print(f"Campaign store updated ({len(changed_files)} new or changed files): {store_path}")
+    return store_path
+
+def query_max_elapsed(store_path, keyword=None, folder_pattern=None, since=None):
+    """
+    Returns the (folder, log_file, keyword, max_elapsed, modified) rows of the store as a
+    dataframe, filtered on keyword, a folder LIKE pattern (e.g. 'PX2%') and a minimum
+    modified date ('2024-05-01'). The filters use the keyword and folder indexes.
+    """
+    conditions, parameters = ["max_elapsed IS NOT NULL"], []
+    for condition, value in (("keyword = ?", keyword), ("folder LIKE ?", folder_pattern), ("modified >= ?", since)):
+        if value is not None:
+            conditions.append(condition)
+            parameters.append(value)
+    query = f"SELECT * FROM max_elapsed WHERE {' AND '.join(conditions)}"
+    connection = sqlite3.connect(store_path)
+    try:
+        return pd.read_sql_query(query, connection, params=parameters)
+    finally:
+        connection.close()
+
 # Main execution
 if __name__ == "__main__":
     # Prompt the user for the main folder path
     main_folder = input("Please provide the full path to the main folder: ")
+    # Prompt the user for a location to save the combined CSV
+    output_file = input("Please provide the full path and filename to save the combined CSV: ")
 
-    # Process all SummaryStats.csv files and combine the data
-    combined_data_with_headers = process_summary_files(main_folder)
+    # Walk the folders once; the CSV and the store are built from the same files
+    summary_files = list(find_summary_files(main_folder))
 
-    if combined_data_with_headers is not None:
-        # Prompt the user for a location to save the combined CSV
-        output_file = input("Please provide the full path and filename to save the combined CSV: ")
-        # Save the combined dataframe to a CSV file
-        combined_data_with_headers.to_csv(output_file, index=False)
+    # Stream all SummaryStats.csv files into the combined CSV
+    if stream_summary_files(main_folder, output_file, use_cache=True, summary_files=summary_files):
         print(f"Combined data has been saved to {output_file}.")
+        # Keep the long-format store of the same data up to date for queries
+        build_campaign_store(main_folder, summary_files=summary_files)
     else:
+        if os.path.exists(output_file):
+            os.remove(output_file)
         print("No data to save.")
@@ -1,156 +1,222 @@
 import os
 import re
+import sys
+import numpy as np
 import pandas as pd
-from datetime import datetime
+from datetime import datetime, timedelta
 import matplotlib.pyplot as plt
-
-# Function to extract specific variables from the log file for the header
-def extract_header_info(log_content):
-    header_info = {
-        "g_meterId": None,
-        "g_mAhRemain": None,
-        "modemIMEI": None,
-        "modemIMSI": None,
-        "g_stIccid.iccid_nu": None,
-        "PCB Type": None
-    }
-
-    # Regex patterns to extract the variable values
-    header_patterns = {
-        "g_meterId": r"g_meterId\s*:\s*(\d+)",
-        "g_mAhRemain": r"g_mAhRemain\s*:\s*(\d+)",
-        "modemIMEI": r"modemIMEI\s*:\s*\"(\d+)\"",
-        "modemIMSI": r"modemIMSI\s*:\s*\"(\d+)\"",
-        "g_stIccid.iccid_nu": r"g_stIccid\.iccid_nu\s*:\s*(\d+)",
-        "PCB Type": r"PCB Type is ([A-Z]+ Board!)"
-    }
-
-    # Search for these patterns in the log content
-    for line in log_content:
-        for key, pattern in header_patterns.items():
-            match = re.search(pattern, line)
-            if match:
-                header_info[key] = match.group(1)
-    
-    return header_info
-
-# Function to extract all timestamps for each step
-def extract_timestamps(log_file_path):
-    # Define search terms for each step (as lists to handle multiple keywords per step)
-    steps_keywords = {
-        "Meter Wakes up": [r"DEEPSLEEP_RESET"],
-        "Attaches to GSM Network": [r"resetModem", r"get network status"],
-        "Opens Protocol (TCP or MQTT)": [r"Modem Connect to PPP Server", r"MQTT ACK"],
-        "Authenticates to Server": [r"get_cacert"],
-        "Check for Job / Commands": [r"handleIncomePublish.*jobs/get/accepted"],
-        "Meter Finishes Executing Command": [r"AdjustCredit"],
-        "Send Telemetry Data": [r"aws_Publish.*successed", r"meter-status"],
-        "Disconnection from Server": [r"aws_Disconnect"],
-        "Disconnection from GSM Network": [r"PPP state changed event 5"],
-        "Deep Sleep": [r"into low power"]
-    }
-
-    # Reading the log file
-    try:
-        with open(log_file_path, 'r') as file:
-            log_content = file.readlines()
-    except FileNotFoundError:
-        print(f"Error: The file '{log_file_path}' was not found. Please check the file path and try again.")
-        return None, None, None
-
-    # Extract the header information
-    header_info = extract_header_info(log_content)
-
-    # Regex to capture timestamps in the format [HH:MM:SS.SSS]
-    timestamp_pattern = re.compile(r"\[\d{2}:\d{2}:\d{2}\.\d{3}\]")
+from matplotlib.figure import Figure
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'logUtils'))
+from logReader import read_log_lines, detect_compression
+from mappedLogScanner import EXTRACTION_ENGINES, map_log_file, find_line_timestamps, iter_matching_lines
+from timestampParser import format_timestamp_ms, MonotonicTimeline, monotonic_timestamps_ms
+from wakeCycles import WakeCycleSegmenter
+
+# Regex patterns to extract the variable values for the header
+header_patterns = {
+    "g_meterId": re.compile(r"g_meterId\s*:\s*(\d+)"),
+    "g_mAhRemain": re.compile(r"g_mAhRemain\s*:\s*(\d+)"),
+    "modemIMEI": re.compile(r"modemIMEI\s*:\s*\"(\d+)\""),
+    "modemIMSI": re.compile(r"modemIMSI\s*:\s*\"(\d+)\""),
+    "g_stIccid.iccid_nu": re.compile(r"g_stIccid\.iccid_nu\s*:\s*(\d+)"),
+    "PCB Type": re.compile(r"PCB Type is ([A-Z]+ Board!)")
+}
+
+# Header values that do not change during a log; their pattern is not evaluated again
+# after the first match. The other values (e.g. g_mAhRemain) keep the last match.
+single_value_headers = {"g_meterId", "modemIMEI", "modemIMSI", "g_stIccid.iccid_nu", "PCB Type"}
+
+# Function to check one log line against the header patterns that are still pending
+def update_header_info(header_info, pending_patterns, line):
+    for key, pattern in list(pending_patterns.items()):
+        match = pattern.search(line)
+        if match:
+            header_info[key] = match.group(1)
+            if key in single_value_headers:
+                del pending_patterns[key]
+
+# Search terms for each step (as lists to handle multiple keywords per step)
+steps_keywords = {
+    "Meter Wakes up": [r"DEEPSLEEP_RESET"],
+    "Attaches to GSM Network": [r"resetModem", r"get network status"],
+    "Opens Protocol (TCP or MQTT)": [r"Modem Connect to PPP Server", r"MQTT ACK"],
+    "Authenticates to Server": [r"get_cacert"],
+    "Check for Job / Commands": [r"handleIncomePublish.*jobs/get/accepted"],
+    "Meter Finishes Executing Command": [r"AdjustCredit"],
+    "Send Telemetry Data": [r"aws_Publish.*successed", r"meter-status"],
+    "Disconnection from Server": [r"aws_Disconnect"],
+    "Disconnection from GSM Network": [r"PPP state changed event 5"],
+    "Deep Sleep": [r"into low power"]
+}
+
+# Regex to capture timestamps in the format [HH:MM:SS.SSS]
+timestamp_pattern = re.compile(r"\[\d{2}:\d{2}:\d{2}\.\d{3}\]")
+
+# Bytes pattern for the lines that can hold a header value or a step: every header
+# pattern starts with its key, and the step keywords are plain ASCII regexes
+candidate_line_pattern = re.compile(b"|".join(
+    [re.escape(key.encode('ascii')) for key in header_patterns] +
+    [b"(?:" + keyword.encode('ascii') + b")" for keywords in steps_keywords.values() for keyword in keywords]
+))
+
+# Function to check one log line for the steps, once its timestamp is known
+def update_steps(timestamps, cycles, segmenter, line, timestamp):
+    for step, keywords in steps_keywords.items():
+        # Check each keyword for the current step
+        for keyword in keywords:
+            if re.search(keyword, line):
+                timestamps[step].append(timestamp)
+                cycles[step].append(segmenter.assign(step == "Meter Wakes up", step == "Deep Sleep"))
+                break  # Move to the next step once a keyword is found
+
+# Function to find the same header values and steps in a memory-mapped log without decoding
+# every line: the timestamps of all lines are found with NumPy, and only the lines matching
+# candidate_line_pattern are decoded and checked as in the line loop. Lines end at '\n',
+# '\r\n' or '\r' as with the text-mode line reader. Returns the list of all timestamps.
+def extract_timestamps_mapped(buffer, header_info, pending_patterns, timestamps, cycles, segmenter):
+    timestamp_positions, timestamps_ms = find_line_timestamps(buffer, separators=b'\r\n')
+    time_list, _ = monotonic_timestamps_ms(timestamps_ms)
+
+    for start, end in iter_matching_lines(buffer, candidate_line_pattern, separators=b'\r\n'):
+        line = buffer[start:end].decode('utf-8', errors='replace')
+        if end < len(buffer):
+            line += "\n"  # Any line ending reads as '\n' in text mode
+        update_header_info(header_info, pending_patterns, line)
+
+        # Steps are only searched on lines with a timestamp
+        index = int(np.searchsorted(timestamp_positions, start))
+        if index < len(timestamp_positions) and timestamp_positions[index] < end:
+            update_steps(timestamps, cycles, segmenter, line, int(time_list[index]))
+    return time_list.tolist()
+
+# Function to extract all timestamps for each step.
+# engine='lines' searches the log line by line; engine='mmap' maps a plain log into memory
+# and scans it with bytes patterns (see extract_timestamps_mapped), for the same result in
+# a fraction of the time on large logs. Compressed logs are always read line by line.
+def extract_timestamps(log_file_path, engine='lines'):
+    if engine not in EXTRACTION_ENGINES:
+        raise ValueError(f"Unknown extraction engine '{engine}', expected one of {EXTRACTION_ENGINES}")
+
+    # Header information is filled in the same pass as the timestamps
+    header_info = {key: None for key in header_patterns}
+    pending_patterns = dict(header_patterns)
 
     # Dictionary to store the extracted timestamps (as lists to capture multiple matches per step)
     timestamps = {step: [] for step in steps_keywords}
     time_list = []
 
-    # Iterate through log file and find matching entries
-    for line in log_content:
-        timestamp_match = timestamp_pattern.search(line)
-        if timestamp_match:
-            timestamp_str = timestamp_match.group(0)
-            # Convert to datetime object with milliseconds for time calculation
-            timestamp = datetime.strptime(timestamp_str[1:-1], "%H:%M:%S.%f")  # Include milliseconds parsing
-            time_list.append(timestamp)
-            for step, keywords in steps_keywords.items():
-                # Check each keyword for the current step
-                for keyword in keywords:
-                    if re.search(keyword, line):
-                        timestamps[step].append(timestamp)
-                        break  # Move to the next step once a keyword is found
+    # Wake cycle of each extracted timestamp (same layout as timestamps); a log can hold many
+    # DEEPSLEEP_RESET -> "into low power" cycles, which are split while the file is read
+    cycles = {step: [] for step in steps_keywords}
+    segmenter = WakeCycleSegmenter()
 
-    # Return the extracted information
-    return header_info, timestamps, time_list
+    # Timestamps are placed on a monotonic timeline so captures crossing midnight keep increasing
+    timeline = MonotonicTimeline()
 
-# Function to calculate elapsed time based on timestamps in DataFrame
-def calculate_elapsed_time(df):
-    first_time = pd.Timestamp(df['Timestamp'].iloc[0])  # Get the first timestamp from the DataFrame
-    elapsed_times = [(pd.Timestamp(t) - first_time).total_seconds() for t in df['Timestamp']]
+    # Iterate through log file (streamed line by line) and find matching entries
+    try:
+        if engine == 'mmap' and detect_compression(log_file_path) is None:
+            with map_log_file(log_file_path) as buffer:
+                time_list = extract_timestamps_mapped(buffer, header_info, pending_patterns, timestamps, cycles, segmenter)
+        else:
+            for line in read_log_lines(log_file_path):
+                update_header_info(header_info, pending_patterns, line)
+
+                timestamp_match = timestamp_pattern.search(line)
+                if timestamp_match:
+                    timestamp_str = timestamp_match.group(0)
+                    # Convert to integer milliseconds since midnight of the first day for time calculation
+                    timestamp = timeline.update(timestamp_str)
+                    time_list.append(timestamp)
+                    update_steps(timestamps, cycles, segmenter, line, timestamp)
+    except FileNotFoundError:
+        print(f"Error: The file '{log_file_path}' was not found. Please check the file path and try again.")
+        return None, None, None, None
+
+    # Return the extracted information
+    return header_info, timestamps, time_list, cycles
+
+# Function to calculate elapsed time (in seconds) from a list of timestamps in milliseconds.
+# If the wake cycle of each timestamp is given, every cycle is measured from its own first timestamp.
+def calculate_elapsed_time(times_ms, cycles=None):
+    if cycles is None:
+        cycles = [0] * len(times_ms)
+    first_times = {}
+    for t, cycle in zip(times_ms, cycles):
+        first_times.setdefault(cycle, t)  # Get the first timestamp of each cycle
+    elapsed_times = [(t - first_times[cycle]) / 1000 for t, cycle in zip(times_ms, cycles)]
     return elapsed_times
 
-# Function to plot the timestamps
-def create_plot(timestamps, output_file):
-    plt.figure(figsize=(10, 6))
+# Function to plot the timestamps.
+# With show=False the plot is rendered off-screen on a standalone Agg figure (no pyplot state).
+def create_plot(timestamps, output_file, show=True):
+    fig = plt.figure(figsize=(10, 6)) if show else Figure(figsize=(10, 6))
+    ax = fig.add_subplot()
     
+    # Timestamps are milliseconds since midnight; plot them as times of day
     for event, times in timestamps.items():
-        plt.plot(times, [event] * len(times), 'o', label=event)
+        times = [datetime(1900, 1, 1) + timedelta(milliseconds=t) for t in times]
+        ax.plot(times, [event] * len(times), 'o', label=event)
     
-    plt.xlabel("Time")
-    plt.ylabel("Event")
-    plt.title("Event Timeline")
-    plt.grid(True)
-    plt.xticks(rotation=45)
-    plt.tight_layout()
+    ax.set_xlabel("Time")
+    ax.set_ylabel("Event")
+    ax.set_title("Event Timeline")
+    ax.grid(True)
+    ax.tick_params(axis='x', labelrotation=45)
+    fig.tight_layout()
     
     plot_file = output_file.replace(".csv", ".png")
-    plt.savefig(plot_file)
-    plt.show()
+    fig.savefig(plot_file)
     print(f"Plot saved to {plot_file}")
-
-# Prompt the user for the log file path
-log_file_path = input("Please enter the full path to your log file: ")
-
-# Process the log file
-header_info, timestamps, time_list = extract_timestamps(log_file_path)
-if timestamps:
-    # Prepare DataFrame with multiple entries for each step
-    data = [(step, timestamp.strftime("%H:%M:%S")) for step, ts_list in timestamps.items() for timestamp in ts_list]
-    timestamps_df = pd.DataFrame(data, columns=['Event', 'Timestamp'])
-
-    # Calculate elapsed time
-    elapsed_times = calculate_elapsed_time(timestamps_df)
-    timestamps_df['Elapsed Time (s)'] = elapsed_times
-
-    # Display extracted timestamps
-    print("\nExtracted Timestamps:")
-    print(timestamps_df)
-
-    # Suggest output file path
-    suggested_output_file = f"{log_file_path}_output.csv"
-    print(f"Suggested output file path: {suggested_output_file}")
-
-    # Optionally save the results to a CSV file with headers
-    save_to_csv = input("\nDo you want to save the extracted timestamps to a CSV file? (yes/no): ").strip().lower()
-    if save_to_csv == 'yes':
-        output_file = input(f"Enter the full path and filename for the output CSV (press Enter to use suggested: {suggested_output_file}): ").strip() or suggested_output_file
-        
-        # Write to CSV with headers
-        with open(output_file, 'w') as f:
-            # Write the header info at the top of the CSV file
-            f.write("Header Information:\n")
-            for key, value in header_info.items():
-                f.write(f"{key}: {value}\n")
-            f.write("\n")
-
-        # Append the timestamps DataFrame to the CSV
-        timestamps_df.to_csv(output_file, mode='a', index=False)
-        print(f"Timestamps saved to {output_file}")
-
-        # Create and save the plot
-        create_plot(timestamps, output_file)
-    else:
-        print("Timestamps not saved.")
\ No newline at end of file
+    if show:
+        plt.show()
+        plt.close(fig)  # Free the figure once the window is closed
+
+if __name__ == "__main__":
+    # Prompt the user for the log file path
+    log_file_path = input("Please enter the full path to your log file: ")
+
+    # Process the log file (plain logs are memory-mapped and scanned as bytes)
+    header_info, timestamps, time_list, cycles = extract_timestamps(log_file_path, engine='mmap')
+    if timestamps:
+        # Prepare DataFrame with multiple entries for each step
+        data = [(step, timestamp, cycle) for step in timestamps for timestamp, cycle in zip(timestamps[step], cycles[step])]
+        timestamps_df = pd.DataFrame(
+            [(step, format_timestamp_ms(timestamp, milliseconds=False), cycle) for step, timestamp, cycle in data],
+            columns=['Event', 'Timestamp', 'Wake Cycle']
+        )
+
+        # Calculate elapsed time within each wake cycle
+        elapsed_times = calculate_elapsed_time([timestamp for _, timestamp, _ in data], [cycle for _, _, cycle in data])
+        timestamps_df['Elapsed Time (s)'] = elapsed_times
+
+        # Display extracted timestamps
+        print("\nExtracted Timestamps:")
+        print(timestamps_df)
+
+        # Suggest output file path
+        suggested_output_file = f"{log_file_path}_output.csv"
+        print(f"Suggested output file path: {suggested_output_file}")
+
+        # Optionally save the results to a CSV file with headers
+        save_to_csv = input("\nDo you want to save the extracted timestamps to a CSV file? (yes/no): ").strip().lower()
+        if save_to_csv == 'yes':
+            output_file = input(f"Enter the full path and filename for the output CSV (press Enter to use suggested: {suggested_output_file}): ").strip() or suggested_output_file
+
+            # Write to CSV with headers
+            with open(output_file, 'w') as f:
+                # Write the header info at the top of the CSV file
+                f.write("Header Information:\n")
+                for key, value in header_info.items():
+                    f.write(f"{key}: {value}\n")
+                f.write("\n")
+
+            # Append the timestamps DataFrame to the CSV
+            timestamps_df.to_csv(output_file, mode='a', index=False)
+            print(f"Timestamps saved to {output_file}")
+
+            # Create and save the plot
+            create_plot(timestamps, output_file)
+        else:
+            print("Timestamps not saved.")
\ No newline at end of file
@@ -1,176 +1,357 @@
 import re
 import os
+import sys
 import csv
+import time
+import numpy as np
 import matplotlib.pyplot as plt
-from datetime import datetime
+from matplotlib.figure import Figure
+from itertools import repeat
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 
-# Function to extract timestamps for specific keywords
-def extract_times_from_log(log_file_path, keywords):
-    extracted_data = []
-    meter_wake_time = None
-    meterId = None
-    last_timestamp = None  # Keep track of the most recent timestamp
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'logUtils'))
+from logReader import read_log_lines_with_offsets, read_appended_log_lines, is_log_file_name, detect_compression
+from mappedLogScanner import EXTRACTION_ENGINES, map_log_file, find_line_timestamps, iter_matching_lines, read_previous_lines
+from timestampParser import MonotonicTimeline, monotonic_timestamps_ms
+from wakeCycles import WakeCycleSegmenter
+from eventTable import EventTable
+from resultCache import ResultCache
 
-    try:
-        with open(log_file_path, 'r') as log_file:
-            log_lines = log_file.readlines()
-    except FileNotFoundError:
-        print(f"Error: File '{log_file_path}' not found.")
-        return None, None, None
+# Events that open and close a wake cycle (one log can hold many cycles)
+wake_keyword = "cpu_start:"
+sleep_keyword = "into low power!"
 
-    timestamp_pattern = r"\[(\d{2}:\d{2}:\d{2}\.\d{3})\]"
-    
-    # Iterate over log lines
-    for i, line in enumerate(log_lines):
-        # Check if the line contains a timestamp
-        timestamp_match = re.search(timestamp_pattern, line)
-        if timestamp_match:
-            last_timestamp = timestamp_match.group(1)  # Update the last known timestamp
-
-        # Now look for keywords
-        for keyword, meaning in keywords.items():
-            if re.search(re.escape(keyword.strip()), line.strip(), re.IGNORECASE):
-                # If no timestamp found in this line, look back at previous lines
-                if not last_timestamp:
-                    for j in range(1, 4):  # Look back up to 3 lines
-                        if i - j >= 0:  # Ensure index stays valid
-                            previous_line = log_lines[i - j]
-                            timestamp_match = re.search(timestamp_pattern, previous_line)
+# Function to compile all keywords once into a single case-insensitive matcher.
+# The returned function gives the keywords found in a line, in the same order as
+# the keywords dictionary, so callers keep the same output rows as before.
+def compile_keyword_matcher(keywords):
+    ordered_keywords = [keyword for keyword in keywords]
+    if not ordered_keywords:
+        return lambda line: []
+
+    # Longest keywords first, so where several keywords start at the same position the
+    # one containing the others is reported
+    group_names = {f"k{index}": keyword for index, keyword in enumerate(ordered_keywords)}
+    combined_pattern = re.compile(
+        "|".join(f"(?P<{name}>{re.escape(group_names[name].strip())})"
+                 for name in sorted(group_names, key=lambda name: -len(group_names[name].strip()))),
+        re.IGNORECASE
+    )
+
+    # A hit of a keyword is also a hit of every keyword it contains (e.g. "network" in
+    # "get network status"), which the alternation does not report on its own
+    contained_names = {
+        name: {other for other, other_keyword in group_names.items()
+               if other_keyword.strip().lower() in keyword.strip().lower()}
+        for name, keyword in group_names.items()
+    }
+
+    def match_keywords(line):
+        found = set()
+        position = 0
+        while position <= len(line):
+            match = combined_pattern.search(line, position)
+            if match is None:
+                break
+            found |= contained_names[match.lastgroup]
+            # Resume right after the start of the hit, so keywords overlapping its end are found too
+            position = match.start() + 1
+        return [group_names[name] for name in sorted(found, key=lambda name: int(name[1:]))]
+
+    return match_keywords
+
+class LogEventExtractor:
+    """
+    Parsing state of one log file: the events found so far (a columnar EventTable of
+    timestamp, keyword id, line offset and cycle), the header values, the monotonic
+    timeline, the wake cycles and the last lines kept for the timestamp look-back.
+    Lines are fed in file order with extract(), all at once or a few at a time while
+    the log is still being written; either way the result is the same.
+    Header keywords listed in single_value_keywords are no longer searched once they have a value.
+    """
+
+    timestamp_pattern = re.compile(r"\[(\d{2}:\d{2}:\d{2}\.\d{3})\]")
+
+    def __init__(self, log_file_path, keywords, header_keywords, single_value_keywords=()):
+        self.extracted_data = EventTable(log_file_path, keywords)
+        self.extracted_values = {keyword: {"meaning": meaning, "data": []} for keyword, meaning in header_keywords.items()}
+        self.keywords = keywords
+        self.single_value_keywords = single_value_keywords
+        self.meter_wake_time = None
+        self.meterId = None
+        self.timeline = MonotonicTimeline()
+        self.segmenter = WakeCycleSegmenter()  # Splits the events into wake cycles as the file is read
+        self.previous_lines = deque(maxlen=3)  # Last 3 lines, for the look-back
+        self.last_timestamp = None  # Most recent timestamp not yet used by an event
+        self.last_timestamp_ms = None  # Same timestamp on the monotonic timeline (keeps increasing past midnight)
+        self.match_keywords = compile_keyword_matcher(keywords)
+        self.pending_header_keywords = dict(header_keywords)
+        self.match_header_keywords = compile_keyword_matcher(self.pending_header_keywords)
+
+    def extract(self, lines_with_offsets):
+        """Feeds (byte offset, line) pairs, e.g. from read_log_lines_with_offsets."""
+        extracted_data = self.extracted_data
+        previous_lines = self.previous_lines
+        timeline = self.timeline
+        timestamp_pattern = self.timestamp_pattern
+        match_keywords = self.match_keywords
+        match_header_keywords = self.match_header_keywords
+        last_timestamp = self.last_timestamp
+        last_timestamp_ms = self.last_timestamp_ms
+
+        try:
+            for line_offset, line in lines_with_offsets:
+                # Check if the line contains a timestamp
+                timestamp_match = timestamp_pattern.search(line)
+                if timestamp_match:
+                    last_timestamp = timestamp_match.group(1)  # Update the last known timestamp
+                    last_timestamp_ms = timeline.update(last_timestamp)
+
+                # Now look for keywords (one scan of the line for all of them)
+                for keyword in match_keywords(line):
+                    # If no timestamp found in this line, look back at previous lines
+                    if not last_timestamp:
+                        for previous_line in reversed(previous_lines):  # Look back up to 3 lines
+                            timestamp_match = timestamp_pattern.search(previous_line)
                             if timestamp_match:
                                 last_timestamp = timestamp_match.group(1)
+                                last_timestamp_ms = timeline.lookup(last_timestamp)
                                 break
 
-                if last_timestamp:
-                    if keyword.lower() == "cpu_start:".lower() and meter_wake_time is None:
-                        meter_wake_time = last_timestamp  # Set the meter wake-up time
+                    if last_timestamp:
+                        self.add_event(keyword, last_timestamp, last_timestamp_ms, line_offset)
+                    last_timestamp = None  # Reset the last timestamp after use
 
-                    extracted_data.append({
-                        'timestamp': last_timestamp,
-                        'keyword': keyword,
-                        'line': line.strip(),
-                        'meaning': meaning
-                    })
-                last_timestamp = None  # Reset the last timestamp after use
+                # Collect the header values from the same line
+                for keyword in match_header_keywords(line):
+                    self.add_header_value(keyword, line)
+                    match_header_keywords = self.match_header_keywords
 
-    if meter_wake_time is None:
-        print("Warning: 'cpu_start:' (meter wake-up event) not found.")
-    
+                previous_lines.append(line)
+        finally:
+            self.last_timestamp, self.last_timestamp_ms = last_timestamp, last_timestamp_ms
+            extracted_data.finalize()
+        return self
+
+    def extract_mapped(self, buffer):
+        """
+        Same result as extract() over a whole log, for a log mapped into memory with
+        map_log_file, on a fresh extractor. The lines are not decoded and searched one by
+        one: the first timestamp of every line is found with NumPy and the lines holding
+        a keyword with one precompiled bytes pattern. Only those lines are decoded and
+        go through the same keyword matching as extract(). Lines end at '\n', '\r\n' or a
+        bare '\r', as with the line readers. The bytes pattern ignores ASCII case only,
+        so non-ASCII look-alikes (e.g. the Kelvin sign for 'k') are not matched.
+        """
+        timestamp_positions, timestamps_ms = find_line_timestamps(buffer, separators=b'\r\n')
+        monotonic_ms, day_offsets_ms = monotonic_timestamps_ms(timestamps_ms)
+        searched_keywords = dict.fromkeys(keyword.strip() for keyword in [*self.keywords, *self.pending_header_keywords])
+        keyword_lines = iter_matching_lines(buffer, re.compile(
+            b"|".join(re.escape(keyword.lower().encode('utf-8')) for keyword in searched_keywords)
+        ), separators=b'\r\n', lowercase=True) if searched_keywords else ()
+
+        unused_from = 0  # Timestamps from this offset on have not been used by an event yet
+        try:
+            for line_offset, line_end in keyword_lines:
+                line = buffer[line_offset:line_end].decode('utf-8', errors='replace')
+                if line_end < len(buffer):
+                    line += '\n'  # Any line ending reads as '\n', as with the line readers
+
+                found_keywords = self.match_keywords(line)
+                if found_keywords:
+                    # What the line loop would hold here: the last timestamp up to this line,
+                    # unless an event used it already
+                    last = int(np.searchsorted(timestamp_positions, line_end)) - 1
+                    last_timestamp = None
+                    if last >= 0 and timestamp_positions[last] >= unused_from:
+                        last_timestamp = buffer[timestamp_positions[last] + 1:timestamp_positions[last] + 13].decode('ascii')
+                        last_timestamp_ms = int(monotonic_ms[last])
+
+                    for keyword in found_keywords:
+                        # If no timestamp found in this line, look back at previous lines
+                        if not last_timestamp:
+                            for previous_line in read_previous_lines(buffer, line_offset, 3, separators=b'\r\n'):
+                                timestamp_match = self.timestamp_pattern.search(previous_line)
+                                if timestamp_match:
+                                    last_timestamp = timestamp_match.group(1)
+                                    timeline = MonotonicTimeline.from_state(int(timestamps_ms[last]), int(day_offsets_ms[last])) \
+                                        if last >= 0 else MonotonicTimeline()
+                                    last_timestamp_ms = timeline.lookup(last_timestamp)
+                                    break
+
+                        if last_timestamp:
+                            self.add_event(keyword, last_timestamp, last_timestamp_ms, line_offset)
+                        last_timestamp = None  # Reset the last timestamp after use
+                    unused_from = line_end
+
+                # Collect the header values from the same line
+                for keyword in self.match_header_keywords(line):
+                    self.add_header_value(keyword, line)
+        finally:
+            self.extracted_data.finalize()
+        return self
+
+    def add_event(self, keyword, timestamp, timestamp_ms, line_offset):
+        is_wake = keyword.lower() == wake_keyword.lower()
+        if is_wake and self.meter_wake_time is None:
+            self.meter_wake_time = timestamp  # Set the meter wake-up time
+
+        self.extracted_data.append(
+            timestamp_ms,
+            keyword,
+            line_offset,
+            self.segmenter.assign(is_wake, keyword.lower() == sleep_keyword.lower())
+        )
+
+    def add_header_value(self, keyword, line):
+        value = line.split(keyword)[-1].strip()
+        self.extracted_values[keyword]["data"].append(value)
+        if keyword in self.single_value_keywords:
+            del self.pending_header_keywords[keyword]
+            self.match_header_keywords = compile_keyword_matcher(self.pending_header_keywords)
+
+# Function to extract event timestamps and header values in a single pass over the log file.
+# The events are returned as a columnar EventTable (timestamp, keyword id, line offset, cycle).
+# Header keywords listed in single_value_keywords are no longer searched once they have a value.
+# engine='lines' decodes and searches the log line by line; engine='mmap' maps the file into
+# memory and scans it with bytes patterns (LogEventExtractor.extract_mapped), which gives the
+# same result much faster on large logs. Compressed logs are always read line by line.
+def extract_events_and_values_from_log(log_file_path, keywords, header_keywords, single_value_keywords=(),
+                                       engine='lines'):
+    if engine not in EXTRACTION_ENGINES:
+        raise ValueError(f"Unknown extraction engine '{engine}', expected one of {EXTRACTION_ENGINES}")
+    extractor = LogEventExtractor(log_file_path, keywords, header_keywords, single_value_keywords)
+
+    try:
+        if engine == 'mmap' and detect_compression(log_file_path) is None:
+            with map_log_file(log_file_path) as buffer:
+                extractor.extract_mapped(buffer)
+        else:
+            # Iterate over log lines, streamed from disk
+            extractor.extract(read_log_lines_with_offsets(log_file_path))
+    except FileNotFoundError:
+        print(f"Error: File '{log_file_path}' not found.")
+        return None, None, None, extractor.extracted_values
+
+    if keywords and extractor.meter_wake_time is None:
+        print(f"Warning: '{wake_keyword}' (meter wake-up event) not found.")
+
+    return extractor.extracted_data, extractor.meter_wake_time, extractor.meterId, extractor.extracted_values
+
+# Function to extract timestamps for specific keywords
+def extract_times_from_log(log_file_path, keywords, engine='lines'):
+    extracted_data, meter_wake_time, meterId, _ = extract_events_and_values_from_log(log_file_path, keywords, {},
+                                                                                     engine=engine)
     return extracted_data, meter_wake_time, meterId
 
-# Function to calculate time elapsed since meter wakes up
+# Function to calculate time elapsed since meter wakes up.
+# Each wake cycle is measured from its own wake-up event and a cycle without a wake-up
+# event continues from the previous one. The elapsed times of the whole EventTable are
+# computed in one vectorized step on the monotonic timeline, so captures that cross
+# midnight stay correct.
 def calculate_time_elapsed(data, meter_wake_time):
     if meter_wake_time is None:
         print("Warning: Cannot calculate time elapsed without meter wake-up time.")
         return data
     
-    try:
-        meter_wake_time_obj = datetime.strptime(meter_wake_time, '%H:%M:%S.%f')
-    except ValueError as e:
-        print(f"Error parsing meter wake-up time: {e}")
-        return data
-    
-    for entry in data:
-        try:
-            event_time_obj = datetime.strptime(entry['timestamp'], '%H:%M:%S.%f')
-            elapsed_time = (event_time_obj - meter_wake_time_obj).total_seconds()
-            entry['time_elapsed'] = f"{elapsed_time:.3f}"
-        except ValueError as e:
-            entry['time_elapsed'] = 'N/A'
-            print(f"Error parsing timestamp: {entry['timestamp']}, {e}")
-    
+    data.compute_elapsed(wake_keyword)
     return data
 
-# Function to save the extracted data into a CSV file with the specified table format
-def save_extracted_data_to_file(extracted_data, meterId, log_file_path, extracted_values):
+# Columns of the event table in the per-file CSV
+event_csv_headers = ['Timestamp', 'Time Elapsed Since Meter Wakes Up', 'Keyword', 'Data in the Line Found', 'Meaning', 'Wake Cycle']
+
+# Function to get the path of the per-file CSV, next to the log file
+def get_extracted_data_file_path(log_file_path, meterId):
     log_file_name = os.path.basename(log_file_path).split('.')[0]
-    log_dir = os.path.dirname(log_file_path)
+    return os.path.join(os.path.dirname(log_file_path), f"{log_file_name}_{meterId}_timestamps.csv")
 
-    file_name = f"{log_file_name}_{meterId}_timestamps.csv"
-    output_file_path = os.path.join(log_dir, file_name)
+# Function to write the start of the per-file CSV: the header information and the event table header
+def write_extracted_data_header(file, extracted_values):
+    writer = csv.writer(file)
+    file.write("Header Information:\n")
+    writer.writerow(["Keyword", "Meaning", "Value"])
+    for keyword, value in extracted_values.items():
+        if value:
+            writer.writerow([keyword, value['meaning'], ', '.join(value['data'])])
+    file.write("\n\n")
+    writer.writerow(event_csv_headers)
+
+# Function to write event rows (dicts from EventTable.rows) to the per-file CSV
+def write_extracted_data_rows(file, rows):
+    writer = csv.writer(file)
+    for entry in rows:
+        writer.writerow([
+            entry['timestamp'],
+            entry['time_elapsed'],
+            entry['keyword'],
+            entry['line'],
+            entry['meaning'],
+            entry['cycle']
+        ])
+
+# Function to save the extracted data into a CSV file with the specified table format
+def save_extracted_data_to_file(extracted_data, meterId, log_file_path, extracted_values):
+    output_file_path = get_extracted_data_file_path(log_file_path, meterId)
 
-    headers = ['Timestamp', 'Time Elapsed Since Meter Wakes Up', 'Keyword', 'Data in the Line Found', 'Meaning']
-    
     try:
         with open(output_file_path, 'w', newline='') as file:
-            writer = csv.writer(file)
-            file.write("Header Information:\n")
-            writer.writerow(["Keyword", "Meaning", "Value"])
-            for keyword, value in extracted_values.items():
-                if value:
-                    writer.writerow([keyword, value['meaning'], ', '.join(value['data'])])
-            file.write("\n\n")
-            writer.writerow(headers)
-            for entry in extracted_data:
-                writer.writerow([
-                    entry['timestamp'],
-                    entry.get('time_elapsed', 'N/A'),
-                    entry['keyword'],
-                    entry['line'],
-                    entry['meaning']
-                ])
+            write_extracted_data_header(file, extracted_values)
+            write_extracted_data_rows(file, extracted_data.rows())
         
         print(f"Data saved to {output_file_path}")
     except Exception as e:
         print(f"Error saving data to file: {e}")
     return output_file_path
 
-# Function to plot the keywords vs relative time
-def plot_keywords_vs_time(extracted_data, log_file_path, meterId):
-    plt.figure(figsize=(10, 6))
-    
-    for entry in extracted_data:
-        if 'time_elapsed' in entry and entry['time_elapsed'] != 'N/A':
-            plt.scatter(float(entry['time_elapsed']), entry['keyword'], s=100)
+# Function to plot the keywords vs relative time.
+# With show=False the plot is rendered off-screen on a standalone Agg figure (no pyplot
+# state), which is safe to call from a background worker process.
+def plot_keywords_vs_time(extracted_data, log_file_path, meterId, show=True):
+    fig = plt.figure(figsize=(10, 6)) if show else Figure(figsize=(10, 6))
+    ax = fig.add_subplot()
+
+    # Draw each keyword series in one call, in order of first appearance
+    valid = ~np.isnan(extracted_data.elapsed)
+    keyword_ids = extracted_data.keyword_id[valid]
+    elapsed = extracted_data.elapsed[valid]
+    unique_ids, first_rows = np.unique(keyword_ids, return_index=True)
+    for keyword_id in unique_ids[np.argsort(first_rows)]:
+        times = elapsed[keyword_ids == keyword_id]
+        keyword = extracted_data.keywords[keyword_id]
+        ax.scatter(times, [keyword] * len(times), s=100)
 
-    plt.xlabel('Relative Time (in seconds)')
-    plt.title('Keywords vs Relative Time')
-    plt.grid(True)
-    plt.tight_layout()
+    ax.set_xlabel('Relative Time (in seconds)')
+    ax.set_title('Keywords vs Relative Time')
+    ax.grid(True)
+    fig.tight_layout()
 
     log_file_name = os.path.basename(log_file_path).split('.')[0]
     plot_file_name = f"{log_file_name}_{meterId}_plot.png"
     plot_file_path = os.path.join(os.path.dirname(log_file_path), plot_file_name)
     
     try:
-        plt.savefig(plot_file_path)
+        fig.savefig(plot_file_path)
         print(f"Plot saved to {plot_file_path}")
     except Exception as e:
         print(f"Error saving plot: {e}")
     
-    plt.show()
+    if show:
+        plt.show()
+        plt.close(fig)  # Free the figure once the window is closed
 
 # Function to extract values after specific keywords for header information
 def extract_values_from_log(log_file_path, keywords):
-    extracted_data = {keyword: {"meaning": meaning, "data": []} for keyword, meaning in keywords.items()}
-
-    try:
-        with open(log_file_path, 'r') as log_file:
-            log_lines = log_file.readlines()
-    except FileNotFoundError:
-        print(f"Error: File '{log_file_path}' not found.")
-        return extracted_data
-
-    for line in log_lines:
-        for keyword in extracted_data:
-            if re.search(re.escape(keyword.strip()), line.strip(), re.IGNORECASE):
-                value = line.split(keyword)[-1].strip()
-                extracted_data[keyword]["data"].append(value)
-
+    _, _, _, extracted_data = extract_events_and_values_from_log(log_file_path, {}, keywords)
     return extracted_data
 
 # Function to create a summary table for multiple files
-def create_summary_stats_for_multiple_files(all_files_data, keywords, output_file_path):
+def create_summary_stats_for_multiple_files(all_files_data, keywords, output_file_path, verbose=True):
     summary_data = {keyword: [] for keyword in keywords}
     
     # Collect the maximum time elapsed for each keyword from each file
     for file_name, extracted_data in all_files_data.items():
-        file_summary = {}
-        for entry in extracted_data:
-            keyword = entry['keyword']
-            if 'time_elapsed' in entry and entry['time_elapsed'] != 'N/A':
-                elapsed_time = float(entry['time_elapsed'])
-                if keyword not in file_summary or elapsed_time > file_summary[keyword]:
-                    file_summary[keyword] = elapsed_time
+        file_summary = extracted_data.max_elapsed_by_keyword()
         # Add max times for each keyword into the summary_data
         for keyword in summary_data:
             summary_data[keyword].append(file_summary.get(keyword, 'N/A'))
@@ -187,37 +368,291 @@ def create_summary_stats_for_multiple_files(all_files_data, keywords, output_fil
             for keyword, times in summary_data.items():
                 writer.writerow([keyword] + times)
         
-        print(f"Summary saved to {summary_file_path}")
+        if verbose:
+            print(f"Summary saved to {summary_file_path}")
     except Exception as e:
         print(f"Error saving summary to file: {e}")
 
-# Function to process multiple log files in a folder and create a summary
-def process_folder_with_summary(folder_path, keywords, header_keywords):
-    all_files_data = {}
-    for file_name in os.listdir(folder_path):
-        if file_name.endswith(".txt"):  # Assuming log files are in .txt format
-            log_file_path = os.path.join(folder_path, file_name)
-            print(f"Processing file: {file_name}")
-            
-            # Extract times and keywords from the log file
-            extracted_times, meter_wake_time, meterId = extract_times_from_log(log_file_path, keywords)
+# Function to create a per-cycle table for multiple files: one row per wake cycle of each
+# file, with the maximum time elapsed for each keyword within that cycle
+def create_cycle_stats_for_multiple_files(all_files_data, keywords, output_file_path, verbose=True):
+    cycle_rows = []
+    for file_name, extracted_data in all_files_data.items():
+        cycle_summaries = extracted_data.max_elapsed_by_cycle()
+        for cycle, cycle_summary in cycle_summaries.items():
+            cycle_rows.append([file_name, cycle] + [cycle_summary.get(keyword, 'N/A') for keyword in keywords])
+
+    # Write the cycle table to CSV
+    cycle_file_path = os.path.join(output_file_path, "CycleStats.csv")
+
+    try:
+        with open(cycle_file_path, 'w', newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow(['File', 'Wake Cycle'] + list(keywords))
+            writer.writerows(cycle_rows)
+
+        if verbose:
+            print(f"Cycle summary saved to {cycle_file_path}")
+    except Exception as e:
+        print(f"Error saving cycle summary to file: {e}")
+
+# Function to process one log file: extract the events and header values, calculate
+# the time elapsed and save its CSV. Runs in a worker process in parallel mode.
+# With a ResultCache, an unchanged file is not parsed again (its CSV was written when
+# the result was cached); the last value returned tells whether the cache was used.
+# engine selects how the log is scanned (see extract_events_and_values_from_log).
+def process_log_file(log_file_path, keywords, header_keywords, single_value_keywords=(), cache=None, engine='lines'):
+    if cache:
+        cached_result = cache.get(log_file_path)
+        if cached_result is not None:
+            print(f"Using cached result for: {os.path.basename(log_file_path)}")
+            extracted_times, meterId = cached_result
+            return extracted_times, meterId, True
+
+    print(f"Processing file: {os.path.basename(log_file_path)}")
+
+    # Extract times, keywords and header values from the log file in one pass
+    extracted_times, meter_wake_time, meterId, extracted_values = extract_events_and_values_from_log(
+        log_file_path, keywords, header_keywords, single_value_keywords, engine
+    )
+
+    # Calculate the time elapsed since meter wakes up
+    if meter_wake_time:
+        extracted_times = calculate_time_elapsed(extracted_times, meter_wake_time)
 
-            # Extract header values
-            extracted_values = extract_values_from_log(log_file_path, header_keywords)
+    # Save individual CSV for this file
+    save_extracted_data_to_file(extracted_times, meterId, log_file_path, extracted_values)
 
-            # Calculate the time elapsed since meter wakes up
-            if meter_wake_time:
-                extracted_times = calculate_time_elapsed(extracted_times, meter_wake_time)
+    if cache and extracted_times is not None:
+        cache.put(log_file_path, (extracted_times, meterId))
+    return extracted_times, meterId, False
 
+# Function to yield the per-file results in folder order, from a process pool when workers > 1
+def iterate_log_file_results(log_file_paths, keywords, header_keywords, single_value_keywords, workers, cache=None,
+                             engine='lines'):
+    if workers > 1 and len(log_file_paths) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            yield from executor.map(
+                process_log_file,
+                log_file_paths,
+                repeat(keywords),
+                repeat(header_keywords),
+                repeat(single_value_keywords),
+                repeat(cache),
+                repeat(engine)
+            )
+    else:
+        for log_file_path in log_file_paths:
+            yield process_log_file(log_file_path, keywords, header_keywords, single_value_keywords, cache, engine)
+
+# Function to process multiple log files in a folder and create a summary.
+# With workers > 1 the files are spread across a process pool; results are gathered
+# in the same order as the serial path, so SummaryStats.csv is identical.
+# With show_plots=False the plots are rendered off-screen, and with plot_workers > 0
+# they are rendered in a background process pool while the extraction continues.
+# With use_cache=True the per-file results are kept in '.extract_cache' inside the folder,
+# so a rerun only parses new or changed logs; changing the keywords invalidates the cache.
+# With engine='mmap' plain logs are memory-mapped and scanned as bytes, for the same results.
+def process_folder_with_summary(folder_path, keywords, header_keywords, single_value_keywords=(), workers=1,
+                                show_plots=True, plot_workers=0, use_cache=False, engine='lines'):
+    start_time = time.perf_counter()
+    # Log files are in .txt format, plain or compressed (.txt.gz, .txt.xz, .txt.zst)
+    file_names = [file_name for file_name in os.listdir(folder_path) if is_log_file_name(file_name)]
+    log_file_paths = [os.path.join(folder_path, file_name) for file_name in file_names]
+
+    cache = None
+    if use_cache:
+        cache_config = ("extract-v1", keywords, header_keywords, sorted(single_value_keywords), wake_keyword, sleep_keyword)
+        cache = ResultCache(os.path.join(folder_path, ".extract_cache"), cache_config)
+
+    plot_executor = ProcessPoolExecutor(max_workers=plot_workers) if plot_workers > 0 else None
+    plot_futures = []
+    all_files_data = {}
+    try:
+        results = iterate_log_file_results(log_file_paths, keywords, header_keywords, single_value_keywords, workers,
+                                           cache, engine)
+        for file_name, log_file_path, (extracted_times, meterId, from_cache) in zip(file_names, log_file_paths, results):
             # Save the extracted data for this file
             all_files_data[file_name] = extracted_times
 
-            # Save individual CSV and plot for each file
-            save_extracted_data_to_file(extracted_times, meterId, log_file_path, extracted_values)
-            plot_keywords_vs_time(extracted_times, log_file_path, meterId)
+            # Save the plot for each file (cached files were plotted when they were first processed,
+            # and a file that could not be read has nothing to plot)
+            if from_cache or extracted_times is None:
+                continue
+            if plot_executor:
+                future = plot_executor.submit(plot_keywords_vs_time, extracted_times, log_file_path, meterId, False)
+                plot_futures.append((file_name, future))
+            else:
+                plot_keywords_vs_time(extracted_times, log_file_path, meterId, show_plots)
+    finally:
+        if plot_executor:
+            plot_executor.shutdown(wait=True)  # Wait for the remaining plots to be written
+
+    # Report the plots that failed in the background workers
+    for file_name, future in plot_futures:
+        try:
+            future.result()
+        except Exception as e:
+            print(f"Error plotting {file_name}: {e}")
 
     # Create and save the summary stats for all files
     create_summary_stats_for_multiple_files(all_files_data, keywords, folder_path)
+    create_cycle_stats_for_multiple_files(all_files_data, keywords, folder_path)
+    print(f"Processed {len(file_names)} files with {max(workers, 1)} worker(s) in {time.perf_counter() - start_time:.2f} s")
+
+class LogFollower:
+    """
+    Follows one log file that is still being written. It keeps the byte offset reached
+    so far and a LogEventExtractor, so each poll() parses only the complete lines
+    appended since the last one. The new event rows are appended to the per-file CSV
+    once their time elapsed is final, i.e. unless they belong to the last wake cycle and
+    that cycle has no wake-up event yet. A log that shrinks is followed again from the start.
+    """
+
+    read_size = 64 * 1024 * 1024  # Bytes parsed at a time when catching up with a large log
+
+    def __init__(self, log_file_path, keywords, header_keywords, single_value_keywords=()):
+        self.log_file_path = log_file_path
+        self.extractor_arguments = (keywords, header_keywords, single_value_keywords)
+        self.restart()
+
+    def restart(self):
+        self.offset = 0
+        self.rows_written = 0
+        self.in_sync = True  # False while the lines of a poll are being parsed
+        self.extractor = LogEventExtractor(self.log_file_path, *self.extractor_arguments)
+        self.output_file_path = get_extracted_data_file_path(self.log_file_path, self.extractor.meterId)
+        with open(self.output_file_path, 'w', newline='') as file:
+            write_extracted_data_header(file, self.extractor.extracted_values)
+
+    @property
+    def extracted_data(self):
+        return self.extractor.extracted_data
+
+    def poll(self, final=False):
+        """
+        Parses the lines appended since the last poll and returns the number of new events.
+        With final=True a last line without a line ending is parsed too, and all rows are written.
+        """
+        if os.path.getsize(self.log_file_path) < self.offset:
+            print(f"{os.path.basename(self.log_file_path)} was truncated, following it from the start.")
+            self.restart()
+
+        num_events = len(self.extracted_data)
+        read_size = self.read_size
+        while True:
+            lines, next_offset = read_appended_log_lines(self.log_file_path, self.offset, final, read_size)
+            if not lines:
+                # A line longer than the read window has no line ending in it yet: widen the window
+                if os.path.getsize(self.log_file_path) - self.offset >= read_size:
+                    read_size *= 2
+                    continue
+                break
+            self.in_sync = False
+            self.extractor.extract(lines)
+            self.offset = next_offset
+            self.in_sync = True
+            read_size = self.read_size
+
+        new_events = len(self.extracted_data) - num_events
+        if new_events or final:
+            if self.extractor.meter_wake_time:
+                self.extracted_data.compute_elapsed(wake_keyword)
+            self.append_rows(len(self.extracted_data) if final else self.count_final_rows())
+        return new_events
+
+    def count_final_rows(self):
+        """Number of leading events whose time elapsed can no longer change."""
+        data = self.extracted_data
+        if len(data) == 0:
+            return 0
+        last_cycle_start = int(np.searchsorted(data.cycle, data.cycle[-1]))
+        wake_id = data.keyword_ids.get(wake_keyword)
+        if wake_id is not None and (data.keyword_id[last_cycle_start:] == wake_id).any():
+            return len(data)
+        return last_cycle_start
+
+    def append_rows(self, stop):
+        if stop > self.rows_written:
+            with open(self.output_file_path, 'a', newline='') as file:
+                write_extracted_data_rows(file, self.extracted_data.rows(self.rows_written, stop))
+            self.rows_written = stop
+
+    def finish(self):
+        """Parses the rest of the log and writes its CSV in full, as process_log_file would."""
+        if not self.in_sync:
+            self.restart()  # Stopped while parsing, so the lines of that poll are parsed again
+        self.poll(final=True)
+        return save_extracted_data_to_file(self.extracted_data, self.extractor.meterId, self.log_file_path,
+                                           self.extractor.extracted_values)
+
+# Function to follow a folder of logs that are still being written (e.g. UART captures of
+# a bench run). Every poll_interval seconds the new .txt files are picked up and only the
+# bytes appended to each log since the last poll are parsed: the new event rows are appended
+# to the per-file CSVs, and SummaryStats.csv and CycleStats.csv are rewritten from the events
+# already in memory. It runs until Ctrl+C, or until no log has grown for idle_timeout seconds;
+# then the CSVs, summaries and plots are written in full, the same as process_folder_with_summary.
+def follow_folder(folder_path, keywords, header_keywords, single_value_keywords=(), poll_interval=0.5,
+                  idle_timeout=None):
+    followers = {}
+    file_names = []
+    last_change = time.monotonic()
+    print(f"Following {folder_path} (press Ctrl+C to stop)")
+    try:
+        while True:
+            file_names = [file_name for file_name in os.listdir(folder_path) if file_name.endswith(".txt")]
+            removed_files = set(followers) - set(file_names)
+            for file_name in removed_files:
+                del followers[file_name]
+
+            changed = bool(removed_files)
+            grown = False
+            for file_name in file_names:
+                try:
+                    follower = followers.get(file_name)
+                    if follower is None:
+                        follower = followers[file_name] = LogFollower(os.path.join(folder_path, file_name), keywords,
+                                                                      header_keywords, single_value_keywords)
+                        changed = True
+                    offset = follower.offset
+                    new_events = follower.poll()
+                except FileNotFoundError:
+                    continue  # Removed since the folder was listed, dropped on the next poll
+                grown = grown or follower.offset != offset  # Any parsed bytes count, not only events
+                if new_events:
+                    print(f"{file_name}: {new_events} new events")
+                    changed = True
+
+            if changed:
+                all_files_data = {file_name: followers[file_name].extracted_data
+                                  for file_name in file_names if file_name in followers}
+                create_summary_stats_for_multiple_files(all_files_data, keywords, folder_path, verbose=False)
+                create_cycle_stats_for_multiple_files(all_files_data, keywords, folder_path, verbose=False)
+            if changed or grown:
+                last_change = time.monotonic()
+            elif idle_timeout is not None and time.monotonic() - last_change >= idle_timeout:
+                print(f"No log has grown for {idle_timeout} s, stopping.")
+                break
+            time.sleep(poll_interval)
+    except KeyboardInterrupt:
+        print("Stopped following.")
+
+    # Write everything in full, including the last lines without a line ending
+    all_files_data = {}
+    for file_name in file_names:
+        follower = followers.get(file_name)
+        if follower is None:
+            continue
+        try:
+            follower.finish()
+        except FileNotFoundError:
+            continue
+        all_files_data[file_name] = follower.extracted_data
+        plot_keywords_vs_time(follower.extracted_data, follower.log_file_path, follower.extractor.meterId, show=False)
+
+    create_summary_stats_for_multiple_files(all_files_data, keywords, folder_path)
+    create_cycle_stats_for_multiple_files(all_files_data, keywords, folder_path)
+    return all_files_data
 
 # Keywords for event tracking and headers
 keywords = {
@@ -242,8 +677,28 @@ header_keywords = {
     "get network status": "Net Status"
 }
 
-# Ask for folder path
-folder_path = input("Please enter the full path to the folder containing log files: ")
+# Header values that do not change during a log, so only their first occurrence is kept
+single_value_header_keywords = {"g_meterId", "g_stIccid.iccid_nu", "PCB Type"}
+
+if __name__ == "__main__":
+    # Ask for folder path
+    folder_path = input("Please enter the full path to the folder containing log files: ")
+
+    # Follow the logs while they are being written, or process them once
+    follow = input("Follow the logs while they are being written? (yes/no, press Enter for no): ").strip().lower() == 'yes'
+    if follow:
+        follow_folder(folder_path, keywords, header_keywords, single_value_header_keywords)
+    else:
+        # Ask for the number of worker processes (1 processes the files one at a time)
+        workers = input("Number of worker processes (press Enter for 1): ").strip()
+        workers = int(workers) if workers else 1
+
+        # Plots are rendered off-screen in a background process unless they should be shown one by one
+        show_plots = input("Show each plot on screen? (yes/no, press Enter for no): ").strip().lower() == 'yes'
+        plot_workers = 0 if show_plots else 1
+
+        # Run the process for all log files in the folder, reusing the results of unchanged logs.
+        # Plain logs are memory-mapped and scanned as bytes, which is much faster on large logs
+        process_folder_with_summary(folder_path, keywords, header_keywords, single_value_header_keywords, workers,
+                                    show_plots, plot_workers, use_cache=True, engine='mmap')
 
-# Run the process for all log files in the folder
-process_folder_with_summary(folder_path, keywords, header_keywords)
@@ -0,0 +1,63 @@
+import os
+import sys
+import gzip
+import lzma
+import time
+import tempfile
+
+from ExtractEventsFromMultipleLogs import extract_events_and_values_from_log, keywords, header_keywords
+from benchmarkKeywordMatcher import write_synthetic_log
+from logReader import zstandard
+
+# Function to write a compressed copy of a log with the given format
+def compress_log(log_file_path, compression):
+    with open(log_file_path, 'rb') as log_file:
+        data = log_file.read()
+    if compression == 'gzip':
+        compressed_path = log_file_path + '.gz'
+        with gzip.open(compressed_path, 'wb') as compressed_file:
+            compressed_file.write(data)
+    elif compression == 'xz':
+        compressed_path = log_file_path + '.xz'
+        with lzma.open(compressed_path, 'wb') as compressed_file:
+            compressed_file.write(data)
+    else:
+        compressed_path = log_file_path + '.zst'
+        with open(compressed_path, 'wb') as compressed_file:
+            compressed_file.write(zstandard.ZstdCompressor().compress(data))
+    return compressed_path
+
+# Function to extract the events and read back their lines (what the per-file CSV needs)
+def time_extraction(log_file_path):
+    start = time.perf_counter()
+    extracted_data, _, _, _ = extract_events_and_values_from_log(log_file_path, keywords, header_keywords)
+    rows = list(extracted_data.rows())
+    return time.perf_counter() - start, rows
+
+# Function to compare the size and extraction time of a plain log and its compressed copies
+def run_benchmark(num_lines=1_000_000):
+    with tempfile.TemporaryDirectory() as temp_dir:
+        log_file_path = os.path.join(temp_dir, "synthetic_log.txt")
+        print(f"Writing synthetic log with {num_lines} lines...")
+        write_synthetic_log(log_file_path, num_lines)
+
+        plain_size = os.path.getsize(log_file_path)
+        plain_seconds, plain_rows = time_extraction(log_file_path)
+        results = [('plain', plain_size, plain_seconds)]
+
+        for compression in ('gzip', 'xz', 'zstd'):
+            if compression == 'zstd' and zstandard is None:
+                print("Skipping zstd: zstandard is not installed.")
+                continue
+            compressed_path = compress_log(log_file_path, compression)
+            seconds, rows = time_extraction(compressed_path)
+            if rows != plain_rows:
+                print(f"Error: the {compression} log gives different rows than the plain log.")
+            results.append((compression, os.path.getsize(compressed_path), seconds))
+
+    print(f"\n{'Input':<8}{'Bytes':>14}{'Ratio':>8}{'Seconds':>10}{'CPU cost':>10}")
+    for name, size, seconds in results:
+        print(f"{name:<8}{size:>14}{plain_size / size:>7.1f}x{seconds:>10.2f}{seconds / plain_seconds - 1:>+10.0%}")
+
+if __name__ == "__main__":
+    run_benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
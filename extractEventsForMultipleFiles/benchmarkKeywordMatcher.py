@@ -0,0 +1,110 @@
+import os
+import re
+import sys
+import time
+import random
+import tempfile
+
+from ExtractEventsFromMultipleLogs import extract_times_from_log, keywords
+
+# Original per-keyword loop, kept here only as the reference for the benchmark
+def extract_times_from_log_reference(log_file_path, keywords):
+    extracted_data = []
+    meter_wake_time = None
+    last_timestamp = None
+
+    with open(log_file_path, 'r') as log_file:
+        log_lines = log_file.readlines()
+
+    timestamp_pattern = r"\[(\d{2}:\d{2}:\d{2}\.\d{3})\]"
+
+    for i, line in enumerate(log_lines):
+        timestamp_match = re.search(timestamp_pattern, line)
+        if timestamp_match:
+            last_timestamp = timestamp_match.group(1)
+
+        for keyword, meaning in keywords.items():
+            if re.search(re.escape(keyword.strip()), line.strip(), re.IGNORECASE):
+                if not last_timestamp:
+                    for j in range(1, 4):
+                        if i - j >= 0:
+                            previous_line = log_lines[i - j]
+                            timestamp_match = re.search(timestamp_pattern, previous_line)
+                            if timestamp_match:
+                                last_timestamp = timestamp_match.group(1)
+                                break
+
+                if last_timestamp:
+                    if keyword.lower() == "cpu_start:".lower() and meter_wake_time is None:
+                        meter_wake_time = last_timestamp
+
+                    extracted_data.append({
+                        'timestamp': last_timestamp,
+                        'keyword': keyword,
+                        'line': line.strip(),
+                        'meaning': meaning
+                    })
+                last_timestamp = None
+
+    return extracted_data, meter_wake_time, None
+
+# Function to write a synthetic meter log with the given number of lines
+def write_synthetic_log(file_path, num_lines, keyword_ratio=0.02, seed=1):
+    random.seed(seed)
+    filler = [
+        "I (1234) uart: rx buffer flushed",
+        "D (2345) modem: AT+CSQ",
+        "I (3456) app_main: heap free 123456",
+        "W (4567) wifi: sta disconnected",
+        "    0x4008f2a1: task stack",
+    ]
+    keyword_list = list(keywords)
+    millis = 0
+    with open(file_path, 'w') as log_file:
+        for _ in range(num_lines):
+            millis += random.randint(1, 50)
+            hours, rest = divmod(millis // 1000, 3600)
+            minutes, seconds = divmod(rest, 60)
+            timestamp = f"[{hours % 24:02d}:{minutes:02d}:{seconds:02d}.{millis % 1000:03d}]"
+            if random.random() < keyword_ratio:
+                message = f"I (99) aws: {random.choice(keyword_list)} ok"
+            else:
+                message = random.choice(filler)
+            # Some lines carry no timestamp so the look-back path is exercised too
+            if random.random() < 0.1:
+                log_file.write(f"{message}\n")
+            else:
+                log_file.write(f"{timestamp} {message}\n")
+
+# Function to time both implementations on the same file
+def run_benchmark(num_lines=1_000_000):
+    with tempfile.TemporaryDirectory() as temp_dir:
+        log_file_path = os.path.join(temp_dir, "synthetic_log.txt")
+        print(f"Writing synthetic log with {num_lines} lines...")
+        write_synthetic_log(log_file_path, num_lines)
+
+        start = time.perf_counter()
+        reference_result = extract_times_from_log_reference(log_file_path, keywords)
+        reference_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        matcher_result = extract_times_from_log(log_file_path, keywords)
+        matcher_seconds = time.perf_counter() - start
+
+        # The matcher returns an EventTable; compare it row by row with the reference dicts
+        matcher_rows = [
+            {key: row[key] for key in ('timestamp', 'keyword', 'line', 'meaning')}
+            for row in matcher_result[0].rows()
+        ]
+
+    if reference_result[0] != matcher_rows or reference_result[1] != matcher_result[1]:
+        print("Error: outputs differ between the reference loop and the combined matcher.")
+    else:
+        print(f"Outputs identical: {len(matcher_rows)} rows")
+
+    print(f"Per-keyword loop: {reference_seconds:.2f} s")
+    print(f"Combined matcher: {matcher_seconds:.2f} s")
+    print(f"Speedup: {reference_seconds / matcher_seconds:.1f}x")
+
+if __name__ == "__main__":
+    run_benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
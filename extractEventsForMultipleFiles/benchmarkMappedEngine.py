@@ -0,0 +1,55 @@
+import os
+import sys
+import time
+import tempfile
+
+from ExtractEventsFromMultipleLogs import extract_events_and_values_from_log, keywords, header_keywords, \
+    single_value_header_keywords
+from benchmarkKeywordMatcher import write_synthetic_log
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'extractEvents'))
+from adjustCreditLogExtractor import extract_timestamps
+
+# Average length of a synthetic log line in bytes, to size the log
+SYNTHETIC_LINE_BYTES = 43
+
+# Function to run the multi-file extractor with one engine; returns the time and everything it outputs
+def time_event_extraction(log_file_path, engine):
+    start = time.perf_counter()
+    extracted_data, meter_wake_time, meterId, extracted_values = extract_events_and_values_from_log(
+        log_file_path, keywords, header_keywords, single_value_header_keywords, engine
+    )
+    seconds = time.perf_counter() - start
+    return seconds, (list(extracted_data.rows()), meter_wake_time, meterId, extracted_values)
+
+# Function to run the AdjustCredit extractor with one engine
+def time_credit_extraction(log_file_path, engine):
+    start = time.perf_counter()
+    result = extract_timestamps(log_file_path, engine)
+    return time.perf_counter() - start, result
+
+# Function to time the line loop against the memory-mapped engine on a large log
+def run_benchmark(size_mb=1024):
+    with tempfile.TemporaryDirectory() as temp_dir:
+        log_file_path = os.path.join(temp_dir, "synthetic_log.txt")
+        print(f"Writing synthetic log of about {size_mb} MB...")
+        write_synthetic_log(log_file_path, size_mb * 1024 * 1024 // SYNTHETIC_LINE_BYTES)
+        log_size_mb = os.path.getsize(log_file_path) / (1024 * 1024)
+
+        results = []
+        for name, time_extraction in (("ExtractEventsFromMultipleLogs", time_event_extraction),
+                                      ("adjustCreditLogExtractor", time_credit_extraction)):
+            lines_seconds, lines_result = time_extraction(log_file_path, 'lines')
+            mmap_seconds, mmap_result = time_extraction(log_file_path, 'mmap')
+            if lines_result != mmap_result:
+                print(f"Error: the engines give different results for {name}.")
+            results.append((name, lines_seconds, mmap_seconds))
+
+    print(f"\nLog size: {log_size_mb:.0f} MB")
+    print(f"{'Extractor':<32}{'lines (s)':>11}{'mmap (s)':>10}{'MB/s':>8}{'Speedup':>9}")
+    for name, lines_seconds, mmap_seconds in results:
+        print(f"{name:<32}{lines_seconds:>11.1f}{mmap_seconds:>10.1f}{log_size_mb / mmap_seconds:>8.0f}"
+              f"{lines_seconds / mmap_seconds:>8.1f}x")
+
+if __name__ == "__main__":
+    run_benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 1024)
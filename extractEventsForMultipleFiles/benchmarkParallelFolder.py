@@ -0,0 +1,40 @@
+import os
+import sys
+import time
+import tempfile
+
+from ExtractEventsFromMultipleLogs import process_folder_with_summary, keywords, header_keywords, single_value_header_keywords
+from benchmarkKeywordMatcher import write_synthetic_log
+
+# Function to run the folder processing once and return the wall-clock time and SummaryStats.csv bytes
+def time_folder_run(folder_path, workers):
+    start = time.perf_counter()
+    process_folder_with_summary(folder_path, keywords, header_keywords, single_value_header_keywords, workers,
+                                show_plots=False)
+    seconds = time.perf_counter() - start
+    with open(os.path.join(folder_path, "SummaryStats.csv"), 'rb') as summary_file:
+        return seconds, summary_file.read()
+
+# Function to compare the serial path against the process pool on a folder of synthetic logs
+def run_benchmark(num_files=16, lines_per_file=100_000, workers=os.cpu_count()):
+    with tempfile.TemporaryDirectory() as folder_path:
+        print(f"Writing {num_files} synthetic logs with {lines_per_file} lines each...")
+        for index in range(num_files):
+            write_synthetic_log(os.path.join(folder_path, f"meter_{index:03d}.txt"), lines_per_file, seed=index)
+
+        serial_seconds, serial_summary = time_folder_run(folder_path, 1)
+        parallel_seconds, parallel_summary = time_folder_run(folder_path, workers)
+
+    if serial_summary == parallel_summary:
+        print("SummaryStats.csv is byte-identical between the serial and parallel runs.")
+    else:
+        print("Error: SummaryStats.csv differs between the serial and parallel runs.")
+
+    print(f"Serial (1 worker): {serial_seconds:.2f} s")
+    print(f"Parallel ({workers} workers): {parallel_seconds:.2f} s")
+    print(f"Speedup: {serial_seconds / parallel_seconds:.1f}x")
+
+if __name__ == "__main__":
+    num_files = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else os.cpu_count()
+    run_benchmark(num_files=num_files, workers=workers)
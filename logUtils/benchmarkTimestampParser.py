@@ -0,0 +1,48 @@
+import sys
+import time
+import random
+from datetime import datetime
+
+from timestampParser import parse_timestamp_ms
+
+# Function to compare datetime.strptime with parse_timestamp_ms on bracketed log timestamps
+def run_benchmark(num_timestamps=10_000_000, distinct=100_000):
+    random.seed(1)
+    # A pool of distinct timestamps is reused so the benchmark does not hold 10M strings in memory
+    pool = []
+    for _ in range(distinct):
+        millis = random.randrange(24 * 3_600_000)
+        seconds, millis = divmod(millis, 1_000)
+        minutes, seconds = divmod(seconds, 60)
+        hours, minutes = divmod(minutes, 60)
+        pool.append(f"[{hours:02d}:{minutes:02d}:{seconds:02d}.{millis:03d}]")
+    rounds = max(num_timestamps // distinct, 1)
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for timestamp in pool:
+            datetime.strptime(timestamp[1:-1], "%H:%M:%S.%f")
+    strptime_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for timestamp in pool:
+            parse_timestamp_ms(timestamp)
+    parser_seconds = time.perf_counter() - start
+
+    # Both must agree on every timestamp in the pool
+    for timestamp in pool:
+        parsed = datetime.strptime(timestamp[1:-1], "%H:%M:%S.%f")
+        expected = ((parsed.hour * 60 + parsed.minute) * 60 + parsed.second) * 1_000 + parsed.microsecond // 1_000
+        if parse_timestamp_ms(timestamp) != expected:
+            print(f"Error: mismatch for {timestamp}")
+            break
+
+    total = rounds * distinct
+    print(f"Timestamps parsed: {total}")
+    print(f"datetime.strptime: {strptime_seconds:.2f} s ({strptime_seconds / total * 1e9:.0f} ns each)")
+    print(f"parse_timestamp_ms: {parser_seconds:.2f} s ({parser_seconds / total * 1e9:.0f} ns each)")
+    print(f"Speedup: {strptime_seconds / parser_seconds:.1f}x")
+
+if __name__ == "__main__":
+    run_benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 10_000_000)
@@ -0,0 +1,124 @@
+from array import array
+
+import numpy as np
+
+from logReader import open_log_file, read_line_at
+from timestampParser import format_timestamp_ms
+
+class EventTable:
+    """
+    Compact columnar store for the events extracted from one log file. Instead of
+    a dict per event holding the whole line, each event is one row of:
+
+    - timestamp_ms: int64 milliseconds on the monotonic timeline
+    - keyword_id: uint16 index into `keywords`
+    - line_offset: int64 byte offset of the line in the source file
+    - cycle: int32 wake cycle index
+    - elapsed: float64 seconds since the wake-up of the cycle (NaN when unknown)
+
+    Rows are appended while the log is read and turned into NumPy arrays by finalize().
+    """
+
+    def __init__(self, source_path, keywords):
+        self.source_path = source_path
+        self.keywords = list(keywords)
+        self.meanings = [keywords[keyword] for keyword in self.keywords]
+        self.keyword_ids = {keyword: index for index, keyword in enumerate(self.keywords)}
+        self._columns = (array('q'), array('H'), array('q'), array('i'))
+        self.timestamp_ms = np.empty(0, dtype=np.int64)
+        self.keyword_id = np.empty(0, dtype=np.uint16)
+        self.line_offset = np.empty(0, dtype=np.int64)
+        self.cycle = np.empty(0, dtype=np.int32)
+        self.elapsed = np.empty(0, dtype=np.float64)
+
+    def append(self, timestamp_ms, keyword, line_offset, cycle):
+        timestamps, keyword_ids, line_offsets, cycles = self._columns
+        timestamps.append(timestamp_ms)
+        keyword_ids.append(self.keyword_ids[keyword])
+        line_offsets.append(line_offset)
+        cycles.append(cycle)
+
+    def finalize(self):
+        """Moves the appended rows into the NumPy columns."""
+        timestamps, keyword_ids, line_offsets, cycles = self._columns
+        self.timestamp_ms = np.concatenate([self.timestamp_ms, np.frombuffer(timestamps, dtype=np.int64)])
+        self.keyword_id = np.concatenate([self.keyword_id, np.frombuffer(keyword_ids, dtype=np.uint16)])
+        self.line_offset = np.concatenate([self.line_offset, np.frombuffer(line_offsets, dtype=np.int64)])
+        self.cycle = np.concatenate([self.cycle, np.frombuffer(cycles, dtype=np.int32)])
+        self.elapsed = np.concatenate([self.elapsed, np.full(len(timestamps), np.nan)])
+        self._columns = (array('q'), array('H'), array('q'), array('i'))
+        return self
+
+    def __len__(self):
+        return len(self.timestamp_ms)
+
+    def compute_elapsed(self, wake_keyword):
+        """
+        Computes the elapsed seconds of every event in one vectorized step. Each
+        cycle is measured from its first wake_keyword event; a cycle without one
+        continues from the previous cycle, and events before any wake-up are NaN.
+        """
+        self.elapsed = np.full(len(self), np.nan)
+        wake_id = self.keyword_ids.get(wake_keyword)
+        if wake_id is None or len(self) == 0:
+            return self.elapsed
+
+        num_cycles = int(self.cycle.max()) + 1
+        wake_rows = np.flatnonzero(self.keyword_id == wake_id)
+        wake_cycles, first_wake = np.unique(self.cycle[wake_rows], return_index=True)
+
+        # Index of the wake row used by each cycle, carried forward to cycles without a wake-up
+        cycle_wake_row = np.full(num_cycles, -1, dtype=np.int64)
+        cycle_wake_row[wake_cycles] = wake_rows[first_wake]
+        has_wake = np.where(cycle_wake_row >= 0, np.arange(num_cycles), -1)
+        source_cycle = np.maximum.accumulate(has_wake)
+        wake_row = np.where(source_cycle >= 0, cycle_wake_row[np.maximum(source_cycle, 0)], -1)[self.cycle]
+
+        valid = wake_row >= 0
+        self.elapsed[valid] = (self.timestamp_ms[valid] - self.timestamp_ms[wake_row[valid]]) / 1000
+        return self.elapsed
+
+    def max_elapsed_by_keyword(self):
+        """Returns {keyword: maximum elapsed seconds} over all events with an elapsed time."""
+        valid = ~np.isnan(self.elapsed)
+        maxima = np.full(len(self.keywords), -np.inf)
+        np.maximum.at(maxima, self.keyword_id[valid], self.elapsed[valid])
+        return {self.keywords[index]: float(value) for index, value in enumerate(maxima) if value != -np.inf}
+
+    def max_elapsed_by_cycle(self):
+        """
+        Returns {cycle: {keyword: maximum elapsed seconds}} for every cycle with at
+        least one elapsed time, computed for all cycles at once.
+        """
+        valid = ~np.isnan(self.elapsed)
+        if not valid.any():
+            return {}
+        cycles = self.cycle[valid]
+        maxima = np.full((int(cycles.max()) + 1, len(self.keywords)), -np.inf)
+        np.maximum.at(maxima, (cycles, self.keyword_id[valid]), self.elapsed[valid])
+        return {
+            int(cycle): {self.keywords[index]: float(value) for index, value in enumerate(maxima[cycle]) if value != -np.inf}
+            for cycle in np.unique(cycles)
+        }
+
+    def read_lines(self, start=0, stop=None):
+        """Reads the source line of every event (or of rows start to stop) back from the log file."""
+        with open_log_file(self.source_path) as log_file:
+            return [read_line_at(log_file, int(offset)).strip() for offset in self.line_offset[start:stop]]
+
+    def rows(self, start=0, stop=None):
+        """
+        Yields one dict per event (or per event of rows start to stop) with the same keys
+        as the row-based extraction ('timestamp', 'keyword', 'line', 'meaning', 'time_elapsed', 'cycle').
+        """
+        for index, line in enumerate(self.read_lines(start, stop), start):
+            keyword_id = self.keyword_id[index]
+            elapsed = self.elapsed[index]
+            yield {
+                'timestamp': format_timestamp_ms(int(self.timestamp_ms[index])),
+                'keyword': self.keywords[keyword_id],
+                'line': line,
+                'meaning': self.meanings[keyword_id],
+                'time_elapsed': 'N/A' if np.isnan(elapsed) else f"{elapsed:.3f}",
+                'cycle': int(self.cycle[index])
+            }
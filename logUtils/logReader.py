@@ -0,0 +1,205 @@
+import io
+import gzip
+import lzma
+
+try:
+    import zstandard  # Optional, only needed for zstd-compressed logs
+except ImportError:
+    zstandard = None
+
+# Magic bytes at the start of the compressed formats that are decoded on the fly
+COMPRESSION_MAGIC = {
+    b'\x1f\x8b': 'gzip',
+    b'\xfd7zXZ\x00': 'xz',
+    b'\x28\xb5\x2f\xfd': 'zstd'
+}
+
+# File names picked up as logs: plain .txt files, and .txt files compressed as a whole
+LOG_FILE_SUFFIXES = ('.txt', '.txt.gz', '.txt.xz', '.txt.zst')
+
+def is_log_file_name(file_name):
+    """Tells whether a file name is a plain or compressed .txt log."""
+    return file_name.lower().endswith(LOG_FILE_SUFFIXES)
+
+def detect_compression(log_file_path):
+    """
+    Returns 'gzip', 'xz' or 'zstd' when the file starts with the magic bytes of that
+    format, or None for a plain file. The name of the file is not used.
+    """
+    with open(log_file_path, 'rb') as log_file:
+        start = log_file.read(max(len(magic) for magic in COMPRESSION_MAGIC))
+    for magic, compression in COMPRESSION_MAGIC.items():
+        if start.startswith(magic):
+            return compression
+    return None
+
+class ZstdLogStream(io.RawIOBase):
+    """
+    Raw binary stream over a zstd-compressed file that can seek the way gzip and lzma
+    files do: forward by decoding and dropping bytes, backward by restarting the
+    decoding. zstandard's own reader only seeks forward and reports itself as not
+    seekable, so it cannot be used with io.BufferedReader directly.
+    """
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self._reader = self._open_reader()
+        self._position = 0
+
+    def _open_reader(self):
+        return zstandard.ZstdDecompressor().stream_reader(open(self.file_path, 'rb'), closefd=True)
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def readinto(self, buffer):
+        size = self._reader.readinto(buffer)
+        self._position += size
+        return size
+
+    def tell(self):
+        return self._position
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self._position
+        elif whence != io.SEEK_SET:
+            raise io.UnsupportedOperation("zstd logs cannot seek from the end")
+        if offset < self._position:
+            self._reader.close()
+            self._reader = self._open_reader()
+            self._position = 0
+        while self._position < offset:
+            skipped = len(self._reader.read(min(offset - self._position, 1024 * 1024)))
+            if not skipped:
+                break
+            self._position += skipped
+        return self._position
+
+    def close(self):
+        if not self.closed:
+            self._reader.close()
+        super().close()
+
+def open_log_file(log_file_path):
+    """
+    Opens a log file for reading in binary mode. A gzip, xz or zstd file (recognised by
+    its magic bytes) is decompressed chunk by chunk while it is read, so compressed
+    logs never need to be unpacked to disk. Offsets and seek() refer to the
+    decompressed bytes; seeking forward is cheap, seeking backward restarts the decoding.
+    """
+    compression = detect_compression(log_file_path)
+    if compression == 'gzip':
+        return gzip.open(log_file_path, 'rb')
+    if compression == 'xz':
+        return lzma.open(log_file_path, 'rb')
+    if compression == 'zstd':
+        if zstandard is None:
+            raise ImportError(f"Reading the zstd-compressed log '{log_file_path}' needs zstandard: pip install zstandard")
+        return io.BufferedReader(ZstdLogStream(log_file_path), 1024 * 1024)
+    return open(log_file_path, 'rb')
+
+def read_log_lines(log_file_path, encoding='utf-8'):
+    """
+    Yields the lines of a log file one at a time, so memory use stays flat
+    no matter how large the file is. Undecodable bytes (UART noise) are replaced
+    instead of stopping the read, as in read_log_lines_with_offsets. Compressed
+    logs are decoded on the fly.
+    """
+    with io.TextIOWrapper(open_log_file(log_file_path), encoding=encoding, errors='replace') as log_file:
+        for line in log_file:
+            yield line
+
+def iter_raw_log_lines(log_file, block_size=1024 * 1024):
+    """
+    Yields the lines of a log file opened in binary mode, with their line endings,
+    split like text mode (universal newlines) splits them: at '\n', '\r\n' or a bare
+    '\r', which some UART captures use. A '\r' at the end of a block is held back
+    until the next block shows whether a '\n' follows it.
+    """
+    pending = b''
+    while True:
+        block = log_file.read(block_size)
+        if not block:
+            if pending:
+                yield pending
+            return
+        lines = (pending + block).splitlines(keepends=True)  # bytes split on '\n', '\r\n' and '\r' only
+        pending = lines.pop()
+        if pending.endswith(b'\n'):
+            lines.append(pending)
+            pending = b''
+        yield from lines
+
+def decode_log_line(raw_line, encoding='utf-8'):
+    """
+    Decodes a raw line, replacing undecodable bytes, and ends it with '\n' whatever
+    its line ending was, as text mode does.
+    """
+    line = raw_line.decode(encoding, errors='replace')
+    if line.endswith('\r\n'):
+        return line[:-2] + '\n'
+    if line.endswith('\r'):
+        return line[:-1] + '\n'
+    return line
+
+def read_log_lines_with_offsets(log_file_path, encoding='utf-8'):
+    """
+    Yields (offset, line) for each line of a log file, where offset is the byte
+    position of the line in the file. The file is read in binary mode so the
+    offsets can be used later to seek back to a line, and split and translated as
+    in text mode (see iter_raw_log_lines); undecodable bytes (UART noise) are
+    replaced instead of stopping the read. Compressed logs are decoded on the fly
+    and the offsets are positions in the decompressed text.
+    """
+    offset = 0
+    with open_log_file(log_file_path) as log_file:
+        for raw_line in iter_raw_log_lines(log_file):
+            yield offset, decode_log_line(raw_line, encoding)
+            offset += len(raw_line)
+
+def read_line_at(log_file, offset, encoding='utf-8'):
+    """
+    Reads back the line starting at byte `offset` from a log file opened in
+    binary mode (e.g. with open_log_file), without its line ending.
+    """
+    log_file.seek(offset)
+    # readline() stops right after the '\n', so reading the next line seeks forward (cheap for
+    # compressed logs); a line can also end at an earlier bare '\r', which is cut off here
+    raw_line = b''
+    while True:
+        chunk = log_file.readline(64 * 1024)
+        raw_line += chunk
+        if not chunk or chunk.endswith(b'\n') or b'\r' in chunk:
+            break
+    raw_line = raw_line.splitlines()[0] if raw_line else b''
+    return raw_line.decode(encoding, errors='replace')
+
+def read_appended_log_lines(log_file_path, start_offset, include_partial=False, max_bytes=-1, encoding='utf-8'):
+    """
+    Reads the lines written to a growing log file since byte `start_offset`.
+    Returns ([(offset, line), ...], next_offset), split and decoded the same way as
+    read_log_lines_with_offsets. A last line without its line ending may still be
+    being written, so it is left for the next call unless include_partial is True
+    and the end of the file was reached; next_offset is where that call should start.
+    max_bytes caps the bytes read at once (-1 reads to the end of the file).
+    """
+    with open(log_file_path, 'rb') as log_file:
+        log_file.seek(start_offset)
+        data = log_file.read(max_bytes)
+    at_end = max_bytes < 0 or len(data) < max_bytes
+
+    raw_lines = data.splitlines(keepends=True)  # Splits like iter_raw_log_lines
+    # The last line is complete once it ends with '\n'; a final bare '\r' may still get its '\n'
+    if raw_lines and not raw_lines[-1].endswith(b'\n') and not (include_partial and at_end):
+        raw_lines.pop()
+
+    lines = []
+    offset = start_offset
+    for raw_line in raw_lines:
+        lines.append((offset, decode_log_line(raw_line, encoding)))
+        offset += len(raw_line)
+    return lines, offset
@@ -0,0 +1,158 @@
+import os
+import mmap
+from contextlib import contextmanager
+
+import numpy as np
+
+# Ways the extractors can scan a log: decoded line by line, or memory-mapped and searched as bytes
+EXTRACTION_ENGINES = ('lines', 'mmap')
+
+# Bytes of the log scanned at a time for timestamps (the NumPy temporaries are a few times this)
+SCAN_CHUNK_BYTES = 64 * 1024 * 1024
+
+# Layout of a '[HH:MM:SS.mmm]' timestamp: offsets of the digits and of the separators from the '['
+TIMESTAMP_LENGTH = 14
+TIMESTAMP_DIGITS = (1, 2, 4, 5, 7, 8, 10, 11, 12)
+TIMESTAMP_SEPARATORS = ((3, b':'), (6, b':'), (9, b'.'), (13, b']'))
+
+@contextmanager
+def map_log_file(log_file_path):
+    """
+    Memory-maps a plain log file read-only and yields the mapping, which the re module
+    and NumPy can scan as one bytes buffer without reading the file into memory.
+    An empty file yields b'' (an empty file cannot be mapped).
+    """
+    with open(log_file_path, 'rb') as log_file:
+        if os.fstat(log_file.fileno()).st_size == 0:
+            yield b''
+            return
+        with mmap.mmap(log_file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            yield buffer
+
+def iter_chunk_bounds(buffer):
+    """
+    Yields (start, end) of consecutive chunks of about SCAN_CHUNK_BYTES covering the
+    buffer. Every chunk but the last ends after a line feed, so no line is split.
+    """
+    start = 0
+    while start < len(buffer):
+        end = buffer.find(b'\n', start + SCAN_CHUNK_BYTES) + 1 if start + SCAN_CHUNK_BYTES < len(buffer) else 0
+        end = end or len(buffer)
+        yield start, end
+        start = end
+
+def find_line_timestamps(buffer, separators=b'\n'):
+    """
+    Finds the first '[HH:MM:SS.mmm]' timestamp of every line of the buffer with NumPy,
+    a chunk at a time. Lines end at any byte of `separators` (b'\\n' for files read in
+    binary mode, b'\\r\\n' for universal newlines). Returns two int64 arrays: the byte
+    offset of each timestamp's '[' and its value in milliseconds since midnight.
+    """
+    data = np.frombuffer(buffer, dtype=np.uint8)
+    positions, values = [], []
+    for start, end in iter_chunk_bounds(buffer):
+        chunk = data[start:end]
+
+        candidates = np.flatnonzero(chunk[:max(len(chunk) - TIMESTAMP_LENGTH + 1, 0)] == ord('['))
+        for offset, separator in TIMESTAMP_SEPARATORS:
+            candidates = candidates[chunk[candidates + offset] == ord(separator)]
+        digits = np.empty((len(TIMESTAMP_DIGITS), len(candidates)), dtype=np.int64)
+        valid = np.ones(len(candidates), dtype=bool)
+        for row, offset in enumerate(TIMESTAMP_DIGITS):
+            digit = chunk[candidates + offset] - np.uint8(ord('0'))  # Wraps around for bytes below '0'
+            valid &= digit < 10
+            digits[row] = digit
+        candidates, digits = candidates[valid], digits[:, valid]
+
+        # Keep the first timestamp of each line
+        is_line_end = chunk == separators[0]
+        for separator in separators[1:]:
+            is_line_end |= chunk == separator
+        line_ends = np.flatnonzero(is_line_end)
+        line_ids = np.searchsorted(line_ends, candidates)
+        first = np.ones(len(candidates), dtype=bool)
+        first[1:] = line_ids[1:] != line_ids[:-1]
+        candidates, digits = candidates[first], digits[:, first]
+
+        hours = digits[0] * 10 + digits[1]
+        minutes = digits[2] * 10 + digits[3]
+        seconds = digits[4] * 10 + digits[5]
+        millis = digits[6] * 100 + digits[7] * 10 + digits[8]
+        positions.append(candidates + start)
+        values.append(((hours * 60 + minutes) * 60 + seconds) * 1_000 + millis)
+
+    if not positions:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    return np.concatenate(positions).astype(np.int64), np.concatenate(values)
+
+def find_separator(buffer, separators, position, backward=False):
+    """
+    Returns the offset of the nearest byte of `separators` after `position` (or before
+    it when backward is True), or -1. The search looks at a small window first and
+    widens it, so a separator that never occurs in the file (e.g. b'\\r') does not cost
+    a scan of the whole buffer every time.
+    """
+    window = 4096
+    while True:
+        if backward:
+            low = max(position - window, 0)
+            found = max(buffer.rfind(bytes([separator]), low, position) for separator in separators)
+            if found >= 0 or low == 0:
+                return found
+        else:
+            high = min(position + window, len(buffer))
+            found = [buffer.find(bytes([separator]), position, high) for separator in separators]
+            found = [offset for offset in found if offset >= 0]
+            if found or high == len(buffer):
+                return min(found, default=-1)
+        window *= 16
+
+def line_bounds(buffer, position, separators=b'\n'):
+    """
+    Returns (start, end) of the line holding byte `position`: start is the offset of its
+    first byte and end the offset of its separator (or the buffer length for a last
+    line without one).
+    """
+    start = find_separator(buffer, separators, position, backward=True) + 1
+    end = find_separator(buffer, separators, position)
+    return start, end if end >= 0 else len(buffer)
+
+def iter_matching_lines(buffer, pattern, separators=b'\n', lowercase=False):
+    """
+    Yields (start, end) (see line_bounds) of every line holding a match of the compiled
+    bytes pattern, in file order and once per line. The search resumes at the next
+    line after each hit, so a match that runs on past the end of its line cannot hide
+    a hit on the next one. Only these lines need to be decoded and checked.
+    With lowercase=True the pattern (written in lower case) is run over an ASCII
+    lowercased copy of each chunk, which matches like re.IGNORECASE but is many times
+    faster, as re cannot use its fast literal search with IGNORECASE.
+    """
+    for chunk_start, chunk_end in iter_chunk_bounds(buffer):
+        chunk = buffer[chunk_start:chunk_end]
+        if lowercase:
+            chunk = chunk.lower()
+        position = 0
+        while True:
+            match = pattern.search(chunk, position)
+            if match is None:
+                break
+            start, end = line_bounds(chunk, match.start(), separators)
+            yield chunk_start + start, chunk_start + end
+            position = end + 1
+
+def read_previous_lines(buffer, start, count, separators=b'\n'):
+    """
+    Returns up to `count` lines just before the line starting at `start`, the nearest
+    first, decoded as the line readers do (line endings read as '\n'). Lines end at
+    any byte of `separators`; with b'\r\n' a '\r\n' pair is one line ending.
+    """
+    lines = []
+    end = start
+    while end > 0 and len(lines) < count:
+        content_end = end - 1  # The line ending of the previous line
+        if content_end > 0 and buffer[content_end - 1:end] == b'\r\n' and b'\r' in separators:
+            content_end -= 1
+        line_start = find_separator(buffer, separators, content_end, backward=True) + 1
+        lines.append(bytes(buffer[line_start:content_end]).decode('utf-8', errors='replace') + '\n')
+        end = line_start
+    return lines
@@ -0,0 +1,66 @@
+import os
+import pickle
+import hashlib
+
+def hash_file_contents(file_path, chunk_size=1024 * 1024):
+    """Returns the BLAKE2b hash of a file's contents, read in chunks."""
+    digest = hashlib.blake2b()
+    with open(file_path, 'rb') as source_file:
+        for chunk in iter(lambda: source_file.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class ResultCache:
+    """
+    On-disk cache of per-file results, so reruns only parse new or changed files.
+
+    Each source file gets one pickle in cache_dir, keyed by its absolute path. An
+    entry is valid while the file keeps the same size and mtime; if only the mtime
+    changed (e.g. the file was copied again) the content hash decides. `config`
+    describes everything else the result depends on (e.g. the keyword set): when
+    it changes, every entry is invalidated.
+    """
+
+    def __init__(self, cache_dir, config=None):
+        self.cache_dir = cache_dir
+        self.config_key = hashlib.blake2b(repr(config).encode('utf-8')).hexdigest()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _entry_path(self, file_path):
+        name = hashlib.blake2b(os.path.abspath(file_path).encode('utf-8'), digest_size=16).hexdigest()
+        return os.path.join(self.cache_dir, f"{name}.pkl")
+
+    def get(self, file_path):
+        """Returns the cached result for file_path, or None if it is missing or stale."""
+        try:
+            with open(self._entry_path(file_path), 'rb') as entry_file:
+                entry = pickle.load(entry_file)
+            stat = os.stat(file_path)
+        except (OSError, pickle.PickleError, EOFError, AttributeError, ImportError):
+            return None
+
+        if entry['config'] != self.config_key or entry['size'] != stat.st_size:
+            return None
+        if entry['mtime_ns'] != stat.st_mtime_ns:
+            if entry['hash'] != hash_file_contents(file_path):
+                return None
+            self.put(file_path, entry['result'], entry['hash'])  # Same content, remember the new mtime
+        return entry['result']
+
+    def put(self, file_path, result, content_hash=None):
+        """Stores the result for file_path together with its size, mtime and content hash."""
+        stat = os.stat(file_path)
+        entry = {
+            'path': os.path.abspath(file_path),
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'hash': content_hash or hash_file_contents(file_path),
+            'config': self.config_key,
+            'result': result
+        }
+        # Write to a temporary file first so a crash never leaves a half-written entry
+        entry_path = self._entry_path(file_path)
+        temp_path = f"{entry_path}.{os.getpid()}.tmp"
+        with open(temp_path, 'wb') as entry_file:
+            pickle.dump(entry, entry_file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, entry_path)
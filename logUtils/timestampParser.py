@@ -0,0 +1,87 @@
+import numpy as np
+
+DAY_MS = 86_400_000  # Milliseconds in one day
+
+def parse_timestamp_ms(timestamp):
+    """
+    Converts a log timestamp 'HH:MM:SS.mmm' (with or without the surrounding
+    brackets) to integer milliseconds since midnight. This is much faster than
+    datetime.strptime for the fixed layout used in the meter logs.
+    """
+    hours, minutes, rest = timestamp.strip('[]').split(':')
+    seconds, millis = rest.split('.')
+    if len(millis) != 3:
+        raise ValueError(f"Invalid timestamp '{timestamp}', expected HH:MM:SS.mmm")
+    return ((int(hours) * 60 + int(minutes)) * 60 + int(seconds)) * 1_000 + int(millis)
+
+def format_timestamp_ms(timestamp_ms, milliseconds=True):
+    """
+    Converts milliseconds back to the time of day 'HH:MM:SS.mmm', or 'HH:MM:SS'
+    when milliseconds is False. Values past midnight (from a MonotonicTimeline)
+    wrap around to the time of day.
+    """
+    seconds, millis = divmod(timestamp_ms % DAY_MS, 1_000)
+    minutes, seconds = divmod(seconds, 60)
+    hours, minutes = divmod(minutes, 60)
+    if milliseconds:
+        return f"{hours:02d}:{minutes:02d}:{seconds:02d}.{millis:03d}"
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
+
+class MonotonicTimeline:
+    """
+    Turns the time-of-day timestamps of a log, fed in file order, into a continuous
+    millisecond axis that keeps increasing across midnight. A jump backwards larger
+    than rollover_threshold_ms is treated as a midnight rollover and adds one day,
+    so multi-day captures can be processed as a single stream.
+    """
+
+    def __init__(self, rollover_threshold_ms=DAY_MS // 2):
+        self.rollover_threshold_ms = rollover_threshold_ms
+        self.day_offset_ms = 0
+        self.rollovers = 0
+        self.last_ms = None
+
+    @classmethod
+    def from_state(cls, last_ms, day_offset_ms, rollover_threshold_ms=DAY_MS // 2):
+        """
+        Returns a timeline in the state it has right after update() was fed a timestamp
+        of last_ms milliseconds (time of day) that landed day_offset_ms into the timeline.
+        """
+        timeline = cls(rollover_threshold_ms)
+        timeline.last_ms = last_ms
+        timeline.day_offset_ms = day_offset_ms
+        return timeline
+
+    def update(self, timestamp):
+        """
+        Feeds the next timestamp of the stream ('HH:MM:SS.mmm', bracketed or not)
+        and returns it as milliseconds since midnight of the first day.
+        """
+        timestamp_ms = parse_timestamp_ms(timestamp)
+        if self.last_ms is not None and self.last_ms - timestamp_ms > self.rollover_threshold_ms:
+            self.day_offset_ms += DAY_MS
+            self.rollovers += 1
+        self.last_ms = timestamp_ms
+        return timestamp_ms + self.day_offset_ms
+
+    def lookup(self, timestamp):
+        """
+        Returns the monotonic milliseconds of a timestamp that was already fed to
+        update(), e.g. one found again by looking back at earlier lines.
+        """
+        timestamp_ms = parse_timestamp_ms(timestamp)
+        if self.last_ms is not None and timestamp_ms - self.last_ms > self.rollover_threshold_ms:
+            return timestamp_ms + self.day_offset_ms - DAY_MS  # Seen before the last rollover
+        return timestamp_ms + self.day_offset_ms
+
+def monotonic_timestamps_ms(timestamps_ms, rollover_threshold_ms=DAY_MS // 2):
+    """
+    Vectorized MonotonicTimeline.update for a whole array of time-of-day milliseconds
+    in file order. Returns (monotonic milliseconds, day offset of each timestamp), the
+    same values that feeding the timestamps to update() one by one would give.
+    """
+    timestamps_ms = np.asarray(timestamps_ms, dtype=np.int64)
+    rollovers = np.zeros(len(timestamps_ms), dtype=np.int64)
+    rollovers[1:] = timestamps_ms[:-1] - timestamps_ms[1:] > rollover_threshold_ms
+    day_offset_ms = np.cumsum(rollovers) * DAY_MS
+    return timestamps_ms + day_offset_ms, day_offset_ms
@@ -0,0 +1,34 @@
+class WakeCycleSegmenter:
+    """
+    Splits the events of a log into wake cycles (wake-up -> deep sleep) while the
+    log is being read, so one capture holding many cycles is never re-read.
+
+    Feed every event in file order to assign(); it returns the cycle index of the
+    event. A new cycle starts with the first event after a deep sleep event, or
+    with a second wake-up event in the same cycle. Cycles are numbered from 0.
+    """
+
+    def __init__(self):
+        self.cycle = 0
+        self._has_wake = False
+        self._asleep = False
+
+    def assign(self, is_wake=False, is_sleep=False):
+        """
+        Returns the cycle index for the next event. is_wake / is_sleep tell whether
+        the event is the wake-up or the deep sleep marker.
+        """
+        if (self._asleep and not is_sleep) or (is_wake and self._has_wake):
+            self.cycle += 1
+            self._has_wake = False
+            self._asleep = False
+        if is_wake:
+            self._has_wake = True
+        if is_sleep:
+            self._asleep = True
+        return self.cycle
+
+    @property
+    def cycle_count(self):
+        """Number of cycles seen so far (at least 1)."""
+        return self.cycle + 1
@@ -0,0 +1,47 @@
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+from px2energyAnalysis import parse_analyzer_times, ANALYZER_BASE_DATE, DAY_NS
+
+# Function to build an analyzer-style 'HH:MM:SS:fff' column (10 ms steps) without a Python loop
+def make_analyzer_times(num_rows, start_ms=10 * 3600 * 1000, step_ms=10):
+    time_ms = (start_ms + np.arange(num_rows, dtype=np.int64) * step_ms) % (DAY_NS // 1_000_000)
+    fields = [time_ms // 3_600_000, time_ms // 60_000 % 60, time_ms // 1000 % 60]
+    chars = np.full((num_rows, 12), ord(':'), dtype=np.uint8)
+    for position, field in zip((0, 3, 6), fields):
+        chars[:, position] = ord('0') + field // 10
+        chars[:, position + 1] = ord('0') + field % 10
+    chars[:, 9] = ord('0') + time_ms % 1000 // 100
+    chars[:, 10] = ord('0') + time_ms % 100 // 10
+    chars[:, 11] = ord('0') + time_ms % 10
+    return chars.view('S12').ravel().astype('U12')
+
+# Function to time the vectorized parser against pd.to_datetime on the same column
+def run_benchmark(num_rows=10_000_000):
+    print(f"Building {num_rows} analyzer time values...")
+    values = make_analyzer_times(num_rows)
+
+    start = time.perf_counter()
+    reference = pd.to_datetime(pd.Series(values, dtype=object), errors='coerce', format='%H:%M:%S:%f')
+    reference_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    parsed = parse_analyzer_times(values)
+    parsed_seconds = time.perf_counter() - start
+
+    # pd.to_datetime has no rollover, so compare the time of day only
+    day_offset = (parsed - ANALYZER_BASE_DATE).astype(np.int64) % DAY_NS
+    reference_offset = (reference.to_numpy().astype('datetime64[ns]') - ANALYZER_BASE_DATE).astype(np.int64)
+    if np.array_equal(day_offset, reference_offset):
+        print(f"Outputs identical: {num_rows} rows")
+    else:
+        print("Error: outputs differ between pd.to_datetime and the vectorized parser.")
+
+    print(f"pd.to_datetime:    {reference_seconds:.2f} s")
+    print(f"Vectorized parser: {parsed_seconds:.2f} s")
+    print(f"Speedup: {reference_seconds / parsed_seconds:.1f}x")
+
+if __name__ == "__main__":
+    run_benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 10_000_000)
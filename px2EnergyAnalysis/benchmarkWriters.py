@@ -0,0 +1,47 @@
+import os
+import sys
+import time
+import tempfile
+import numpy as np
+import pandas as pd
+
+from mergedDataWriters import WRITERS, XLSX_MAX_DATA_ROWS, pyarrow, write_merged_data
+
+# Function to build a merged frame with the same columns as px2energyAnalysis produces
+def make_merged_data(num_rows, seed=1):
+    rng = np.random.default_rng(seed)
+    time_column = np.datetime64('1900-01-01T10:00', 'ns') + (np.arange(num_rows) * 10).astype('timedelta64[ms]')
+    data = pd.DataFrame({
+        'Time': time_column,
+        'DC Current': rng.random(num_rows) * 0.1,
+        'DC Voltage': 3.6 + rng.random(num_rows) * 0.05
+    })
+    data['Power (W)'] = data['DC Current'] * data['DC Voltage']
+    data['Delta Time (h)'] = 10 / 1000 / 3600
+    data['Energy (Wh)'] = data['Power (W)'] * data['Delta Time (h)']
+    return data
+
+# Function to time every writer, and the old pandas to_excel path when the data fits one sheet
+def run_benchmark(num_rows=1_000_000):
+    data = make_merged_data(num_rows)
+    results = []
+    with tempfile.TemporaryDirectory() as temp_dir:
+        if num_rows <= XLSX_MAX_DATA_ROWS:
+            output_file = os.path.join(temp_dir, 'to_excel.xlsx')
+            start = time.perf_counter()
+            data.to_excel(output_file, index=False, engine='openpyxl')
+            results.append(('to_excel (old)', os.path.getsize(output_file), time.perf_counter() - start))
+
+        for output_format in WRITERS:
+            if output_format == 'parquet' and pyarrow is None:
+                print("Skipping parquet: pyarrow is not installed.")
+                continue
+            report = write_merged_data(data, os.path.join(temp_dir, 'merged'), output_format)
+            results.append((output_format, report['bytes'], report['seconds']))
+
+    print(f"\n{'Writer':<16}{'Bytes':>14}{'Seconds':>10}")
+    for name, size, seconds in results:
+        print(f"{name:<16}{size:>14}{seconds:>10.2f}")
+
+if __name__ == "__main__":
+    run_benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
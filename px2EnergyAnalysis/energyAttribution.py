@@ -0,0 +1,53 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'extractEventsForMultipleFiles'))
+from ExtractEventsFromMultipleLogs import extract_times_from_log, keywords
+
+# Function to extract the meter events of a log (see ExtractEventsFromMultipleLogs.py),
+# with the memory-mapped engine as the logs of long captures can be large
+def extract_log_events(log_file_path):
+    events, _, _ = extract_times_from_log(log_file_path, keywords, engine='mmap')
+    return events
+
+# Function to cut the event timeline into phases and integrate the energy of each one.
+# A phase runs from an event to the next event (the last one to the end of the capture)
+# and belongs to the wake cycle of its starting event. event_times holds the time of
+# every event on the capture's clock. Phases not fully inside the capture are flagged.
+def attribute_energy_to_events(index, events, event_times):
+    if len(events) == 0 or len(index.time) == 0:
+        return pd.DataFrame(columns=PHASE_COLUMNS)
+
+    start = np.asarray(event_times, dtype='datetime64[ns]')
+    end = np.append(start[1:], max(index.time[-1], start[-1]))
+    energy_mwh = index.energy_between(start, end) * 1000
+    duration_s = (end - start) / np.timedelta64(1, 's')
+
+    phases = pd.DataFrame({
+        'Wake Cycle': events.cycle,
+        'Phase': np.asarray(events.meanings, dtype=object)[events.keyword_id],
+        'Keyword': np.asarray(events.keywords, dtype=object)[events.keyword_id],
+        'Start Time': start,
+        'End Time': end,
+        'Duration (s)': duration_s,
+        'Energy (mWh)': energy_mwh,
+        'In Capture': (start >= index.time[0]) & (end <= index.time[-1])
+    })
+    with np.errstate(divide='ignore', invalid='ignore'):
+        phases['Average Power (mW)'] = np.where(duration_s > 0, energy_mwh / (duration_s / 3600), np.nan)
+    return phases
+
+PHASE_COLUMNS = ['Wake Cycle', 'Phase', 'Keyword', 'Start Time', 'End Time', 'Duration (s)', 'Energy (mWh)',
+                 'In Capture', 'Average Power (mW)']
+
+# Function to sum the phases per wake cycle and phase, in the order they first occur
+def summarize_phase_energy(phases):
+    summary = phases.groupby(['Wake Cycle', 'Phase'], sort=False).agg(**{
+        'Occurrences': ('Keyword', 'size'),
+        'Duration (s)': ('Duration (s)', 'sum'),
+        'Energy (mWh)': ('Energy (mWh)', 'sum'),
+        'In Capture': ('In Capture', 'all')
+    })
+    return summary.reset_index()
@@ -0,0 +1,128 @@
+import numpy as np
+
+# Names of the per-sample buffers filled by EnergyIntegrator.add_chunk
+ENERGY_BUFFERS = ('power', 'delta_h', 'energy_wh', 'cumulative_wh')
+
+class EnergyIntegrator:
+    """
+    One-pass energy integration over chunks of (time, current, voltage) samples.
+
+    Chunks are fed in time order with add_chunk(); the last sample of each chunk is
+    carried over, so the result does not depend on where the data was split and
+    memory stays bounded by one chunk. Two methods are supported:
+
+    - 'rectangle': Power(i) * (Time(i) - Time(i-1)), with the first delta 0. This is
+      the method calculate_total_energy has always used, and gives the same total.
+    - 'trapezoid': (Power(i-1) + Power(i)) / 2 * (Time(i) - Time(i-1)), which is
+      more accurate when the power changes between samples.
+    """
+
+    METHODS = ('rectangle', 'trapezoid')
+
+    def __init__(self, method='rectangle'):
+        if method not in self.METHODS:
+            raise ValueError(f"Unknown integration method '{method}', expected one of {self.METHODS}")
+        self.method = method
+        self.total_wh = 0.0
+        self.num_rows = 0
+        self.chunk_stats = []
+        self._last_time = None
+        self._last_power = None
+
+    def add_chunk(self, time, current, voltage, out=None):
+        """
+        Integrates one chunk and returns a dict of per-sample float64 arrays for it:
+        'power', 'delta_h', 'energy_wh' and 'cumulative_wh' (running total in Wh).
+        The arrays are written in place into `out` (a dict of preallocated buffers of
+        the chunk's length, e.g. slices of full-length buffers) when it is given.
+        """
+        time = np.asarray(time, dtype='datetime64[ns]').view(np.int64)
+        if out is None:
+            out = {name: np.empty(len(time)) for name in ENERGY_BUFFERS}
+        power, delta_h, energy_wh, cumulative_wh = (out[name] for name in ENERGY_BUFFERS)
+        if len(time) == 0:
+            return out
+
+        np.multiply(current, voltage, out=power)
+
+        # Deltas inside the chunk, plus the one back to the last sample of the previous chunk.
+        # Seconds first, then hours, the same rounding as .dt.total_seconds() / 3600
+        delta_h[0] = 0 if self._last_time is None else time[0] - self._last_time
+        np.subtract(time[1:], time[:-1], out=delta_h[1:], casting='unsafe')
+        np.divide(delta_h, 1e9, out=delta_h)
+        np.divide(delta_h, 3600, out=delta_h)
+
+        if self.method == 'rectangle':
+            np.multiply(power, delta_h, out=energy_wh)
+        else:
+            energy_wh[0] = (power[0] if self._last_power is None else self._last_power) + power[0]
+            np.add(power[:-1], power[1:], out=energy_wh[1:])
+            np.divide(energy_wh, 2, out=energy_wh)
+            np.multiply(energy_wh, delta_h, out=energy_wh)
+
+        chunk_wh = energy_wh.sum()
+        np.cumsum(energy_wh, out=cumulative_wh)
+        cumulative_wh += self.total_wh
+        self.chunk_stats.append({
+            'Chunk': len(self.chunk_stats),
+            'Rows': len(time),
+            'Start Time': time[0].astype('datetime64[ns]'),
+            'End Time': time[-1].astype('datetime64[ns]'),
+            'Energy (Wh)': chunk_wh,
+            'Cumulative Energy (Wh)': self.total_wh + chunk_wh,
+            'Min Power (W)': power.min(),
+            'Max Power (W)': power.max(),
+            'Mean Power (W)': power.mean()
+        })
+
+        self.total_wh += chunk_wh
+        self.num_rows += len(time)
+        self._last_time = time[-1]
+        self._last_power = power[-1]
+        return out
+
+class EnergyIndex:
+    """
+    Cumulative-energy index over a power capture, for the energy of any time interval.
+
+    cumulative_wh[k] is the energy of the first k samples (cumulative_wh[0] is 0), so the
+    energy between two times is a difference of two entries found by binary search:
+    O(log n) per interval, and many intervals at once with one np.searchsorted call.
+    Sample i carries the energy of (Time(i-1), Time(i)], as in calculate_total_energy.
+    """
+
+    def __init__(self, time, cumulative_wh):
+        self.time = np.asarray(time, dtype='datetime64[ns]')
+        self.cumulative_wh = cumulative_wh
+
+    @classmethod
+    def from_energy(cls, time, energy_wh):
+        """Builds the index from per-sample energy, e.g. the 'Energy (Wh)' column."""
+        return cls(time, np.concatenate(([0.0], np.cumsum(energy_wh, dtype=np.float64))))
+
+    def energy_between(self, start, end):
+        """Energy in Wh between start and end (datetime64 scalars or arrays)."""
+        start_index = np.searchsorted(self.time, np.asarray(start, dtype='datetime64[ns]'), side='right')
+        end_index = np.searchsorted(self.time, np.asarray(end, dtype='datetime64[ns]'), side='right')
+        return self.cumulative_wh[end_index] - self.cumulative_wh[start_index]
+
+# Function to integrate whole columns into preallocated full-length float64 buffers, one
+# chunk of chunk_rows rows at a time, without any full-length temporaries. Returns the
+# integrator (total and per-chunk stats), the buffers, and an EnergyIndex that uses the
+# cumulative buffer (one entry longer, starting at 0) for interval queries.
+def integrate_arrays(time, current, voltage, method='rectangle', chunk_rows=1_000_000):
+    time = np.asarray(time, dtype='datetime64[ns]')
+    current = np.asarray(current, dtype=np.float64)
+    voltage = np.asarray(voltage, dtype=np.float64)
+    buffers = {name: np.empty(len(time)) for name in ENERGY_BUFFERS[:-1]}
+    cumulative_wh = np.empty(len(time) + 1)
+    cumulative_wh[0] = 0.0
+    buffers['cumulative_wh'] = cumulative_wh[1:]
+
+    integrator = EnergyIntegrator(method)
+    for start in range(0, len(time), chunk_rows):
+        end = min(start + chunk_rows, len(time))
+        integrator.add_chunk(time[start:end], current[start:end], voltage[start:end],
+                             {name: buffer[start:end] for name, buffer in buffers.items()})
+
+    return integrator, buffers, EnergyIndex(time, cumulative_wh)
@@ -0,0 +1,88 @@
+import numpy as np
+from matplotlib.figure import Figure
+from concurrent.futures import ProcessPoolExecutor
+
+# Resolution the figures are saved at (matplotlib's default savefig dpi)
+PLOT_DPI = 100
+
+# Function to reduce a series to the minimum and maximum sample of each pixel column.
+# The samples are split into num_pixels equal buckets and only the lowest and highest
+# point of every bucket is kept, in time order, so short spikes stay visible while the
+# number of points drawn depends on the image width, not on the number of rows.
+def minmax_decimate(x, y, num_pixels):
+    x = np.asarray(x)
+    y = np.asarray(y, dtype=np.float64)
+    if len(y) <= 2 * num_pixels:
+        return x, y
+
+    bucket_size = -(-len(y) // num_pixels)
+    num_buckets = -(-len(y) // bucket_size)
+    # Pad the last bucket with its last value so the samples fill a (buckets, size) matrix
+    buckets = np.pad(y, (0, num_buckets * bucket_size - len(y)), mode='edge').reshape(num_buckets, bucket_size)
+
+    bucket_starts = np.arange(num_buckets) * bucket_size
+    low = bucket_starts + buckets.argmin(axis=1)
+    high = bucket_starts + buckets.argmax(axis=1)
+    indices = np.minimum(np.column_stack((np.minimum(low, high), np.maximum(low, high))).ravel(), len(y) - 1)
+    return x[indices], y[indices]
+
+# Function to decimate a series for a figure of the given width in inches
+def decimate_for_figure(x, y, figure_width):
+    return minmax_decimate(x, y, int(figure_width * PLOT_DPI))
+
+# Render DC Voltage (left axis) and DC Current (right axis) over time
+def render_current_voltage_plot(current_time, current, voltage_time, voltage, plot_file):
+    fig = Figure(figsize=(12, 6))
+    ax1 = fig.add_subplot()
+
+    # Plot DC Voltage on the primary y-axis
+    ax1.set_xlabel('Time', fontsize=14)
+    ax1.set_ylabel('DC Voltage (V)', color='green', fontsize=14)
+    ax1.plot(*decimate_for_figure(voltage_time, voltage, 12), color='green', label='DC Voltage')
+    ax1.tick_params(axis='y', labelcolor='green')
+
+    # Create a secondary y-axis for DC Current
+    ax2 = ax1.twinx()
+    ax2.set_ylabel('DC Current (A)', color='blue', fontsize=14)
+    ax2.plot(*decimate_for_figure(current_time, current, 12), color='blue', label='DC Current')
+    ax2.tick_params(axis='y', labelcolor='blue')
+
+    ax2.set_title('DC Current and DC Voltage Over Time', fontsize=16)
+    fig.tight_layout()
+    ax2.grid(True)
+    fig.savefig(plot_file)
+    return plot_file
+
+# Render power over time
+def render_power_plot(time, power, plot_file):
+    fig = Figure(figsize=(12, 6))
+    ax = fig.add_subplot()
+    ax.plot(*decimate_for_figure(time, power, 12), color='purple', label='Power (W)')
+    ax.set_title('Power (W) Over Time', fontsize=16)
+    ax.set_xlabel('Time', fontsize=14)
+    ax.set_ylabel('Power (W)', fontsize=14)
+    ax.grid(True)
+    fig.savefig(plot_file)
+    return plot_file
+
+# Render energy per sample over time
+def render_energy_plot(time, energy, plot_file):
+    fig = Figure(figsize=(10, 6))
+    ax = fig.add_subplot()
+    ax.plot(*decimate_for_figure(time, energy, 10), color='purple')
+    ax.set_title('Time vs Energy Consumption (Wh)', fontsize=16)
+    ax.set_xlabel('Time', fontsize=14)
+    ax.set_ylabel('Energy (Wh)', fontsize=14)
+    ax.grid(True)
+    fig.savefig(plot_file)
+    return plot_file
+
+# Function to render several figures, each job being (render function, arguments).
+# With more than one worker every figure is drawn in its own process. The render functions
+# decimate their input, but decimating before submitting keeps the pickled arrays small.
+def render_plots(jobs, workers=1):
+    if workers <= 1 or len(jobs) <= 1:
+        return [render(*args) for render, args in jobs]
+    with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as executor:
+        futures = [executor.submit(render, *args) for render, args in jobs]
+        return [future.result() for future in futures]
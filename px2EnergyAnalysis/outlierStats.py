@@ -0,0 +1,144 @@
+import math
+import numpy as np
+
+OUTLIER_COLUMNS = ('DC Current', 'DC Voltage')
+
+# Function to compute the IQR fences; samples outside them are outliers
+def iqr_bounds(q1, q3, whisker=1.5):
+    iqr = q3 - q1
+    return q1 - whisker * iqr, q3 + whisker * iqr
+
+# Function to compute the exact outlier statistics of several channels at once.
+# values is an (n, channels) array; the quartiles of all channels come from one
+# np.quantile call (a selection, not a full sort) and the fences are applied in one
+# vectorized comparison. Returns, per channel, the quartiles, the fences, the outlier
+# count and the positional indices of the outliers, without copying any rows.
+def outlier_stats(values, columns=OUTLIER_COLUMNS, whisker=1.5):
+    values = np.asarray(values, dtype=np.float64)
+    quantile = np.nanquantile if np.isnan(values).any() else np.quantile
+    q1, q3 = quantile(values, [0.25, 0.75], axis=0)
+    lower, upper = iqr_bounds(q1, q3, whisker)
+    outside = (values < lower) | (values > upper)
+
+    stats = {}
+    for column_index, column in enumerate(columns):
+        indices = np.flatnonzero(outside[:, column_index])
+        stats[column] = {
+            'q1': q1[column_index],
+            'q3': q3[column_index],
+            'lower': lower[column_index],
+            'upper': upper[column_index],
+            'count': len(indices),
+            'indices': indices
+        }
+    return stats
+
+class QuantileSketch:
+    """
+    Streaming quantile sketch with relative accuracy (DDSketch-style log buckets).
+
+    Every value is counted in a logarithmic bucket, so any quantile is returned within
+    relative_accuracy of the true value, while memory grows only with the log of the
+    value range, not with the number of samples. Sketches of chunks can be merged.
+    The accuracy is relative to the value, so a channel with a large offset and a
+    small spread (e.g. a 3.6 V supply) needs a small relative_accuracy.
+    """
+
+    def __init__(self, relative_accuracy=1e-5, min_value=1e-9):
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.min_value = min_value
+        self.positive = {}
+        self.negative = {}
+        self.zero_count = 0
+        self.count = 0
+
+    def _add_keys(self, store, keys):
+        unique_keys, counts = np.unique(keys, return_counts=True)
+        for key, count in zip(unique_keys.tolist(), counts.tolist()):
+            store[key] = store.get(key, 0) + count
+
+    def add(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        positive = values[values > self.min_value]
+        negative = -values[values < -self.min_value]
+        self._add_keys(self.positive, np.ceil(np.log(positive) / self.log_gamma).astype(np.int64))
+        self._add_keys(self.negative, np.ceil(np.log(negative) / self.log_gamma).astype(np.int64))
+        self.zero_count += len(values) - len(positive) - len(negative)
+        self.count += len(values)
+
+    def merge(self, other):
+        for store, other_store in ((self.positive, other.positive), (self.negative, other.negative)):
+            for key, count in other_store.items():
+                store[key] = store.get(key, 0) + count
+        self.zero_count += other.zero_count
+        self.count += other.count
+
+    def _buckets(self):
+        """Yields (representative value, count) for every bucket in increasing order."""
+        for key in sorted(self.negative, reverse=True):
+            yield -2 * self.gamma ** key / (self.gamma + 1), self.negative[key]
+        if self.zero_count:
+            yield 0.0, self.zero_count
+        for key in sorted(self.positive):
+            yield 2 * self.gamma ** key / (self.gamma + 1), self.positive[key]
+
+    def quantile(self, q):
+        if self.count == 0:
+            return math.nan
+        rank = q * (self.count - 1)
+        seen = 0
+        for value, count in self._buckets():
+            seen += count
+            if seen > rank:
+                return value
+        return value
+
+    def count_outside(self, lower, upper):
+        """Approximate number of values below lower or above upper."""
+        return sum(count for value, count in self._buckets() if value < lower or value > upper)
+
+class ChunkedOutlierStats:
+    """
+    Outlier statistics for captures too large to hold in memory, fed chunk by chunk.
+
+    add_chunk() updates one QuantileSketch per channel; finalize() returns the same
+    fields as outlier_stats (quartiles, fences and an approximate count) after that
+    single pass. If the outlier positions are needed, a second pass over the chunks
+    with chunk_indices() applies the final fences to each chunk.
+    """
+
+    def __init__(self, columns=OUTLIER_COLUMNS, whisker=1.5, relative_accuracy=1e-5):
+        self.columns = columns
+        self.whisker = whisker
+        self.sketches = [QuantileSketch(relative_accuracy) for _ in columns]
+        self.stats = None
+
+    def add_chunk(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        for column_index, sketch in enumerate(self.sketches):
+            sketch.add(values[:, column_index])
+
+    def finalize(self):
+        self.stats = {}
+        for column, sketch in zip(self.columns, self.sketches):
+            q1, q3 = sketch.quantile(0.25), sketch.quantile(0.75)
+            lower, upper = iqr_bounds(q1, q3, self.whisker)
+            self.stats[column] = {
+                'q1': q1,
+                'q3': q3,
+                'lower': lower,
+                'upper': upper,
+                'count': sketch.count_outside(lower, upper)
+            }
+        return self.stats
+
+    def chunk_indices(self, values, start=0):
+        """Returns, per channel, the outlier indices of a chunk starting at row start."""
+        values = np.asarray(values, dtype=np.float64)
+        return {
+            column: start + np.flatnonzero((values[:, column_index] < self.stats[column]['lower']) |
+                                           (values[:, column_index] > self.stats[column]['upper']))
+            for column_index, column in enumerate(self.columns)
+        }
@@ -1,183 +1,336 @@
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import numpy as np
+import openpyxl
 import os
+import sys
+from itertools import repeat
+from concurrent.futures import ProcessPoolExecutor
+
+from energyIntegrator import integrate_arrays
+from outlierStats import outlier_stats, OUTLIER_COLUMNS
+from energyPlots import (decimate_for_figure, render_current_voltage_plot, render_power_plot,
+                         render_energy_plot, render_plots)
+from mergedDataWriters import write_merged_data
+from energyAttribution import extract_log_events, attribute_energy_to_events, summarize_phase_energy
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'logUtils'))
+from logReader import is_log_file_name
+
+# Base date used by pd.to_datetime for time-only values, kept so the results match
+ANALYZER_BASE_DATE = np.datetime64('1900-01-01', 'ns')
+DAY_NS = 24 * 3600 * 10**9
+
+# Rows integrated per chunk when calculating the energy
+DEFAULT_CHUNK_ROWS = 1_000_000
+
+# Largest time difference (ms) between a current and a voltage sample that are paired
+DEFAULT_ALIGN_TOLERANCE_MS = 5
+
+# Worker processes used to render the three plots in parallel
+DEFAULT_PLOT_WORKERS = 3
+
+# Base name of the merged data output, also used to skip it when looking for input workbooks
+MERGED_OUTPUT_NAME = 'merged_current_voltage_data'
+
+# Energy per wake cycle and phase of the meter log, written next to the statistics
+PHASE_ENERGY_FILE = 'phase_energy.csv'
+
+# Consolidated table written by the batch mode into the root folder
+BATCH_STATS_FILE = 'energy_batch_stats.csv'
+BATCH_STATS_COLUMNS = ['Folder', 'Current File', 'Voltage File', 'Total Energy (Wh)', 'Merged Rows',
+                       'Outliers in DC Current', 'Outliers in DC Voltage', 'Output File', 'Error']
+
+# Convert the analyzer 'HH:MM:SS:fff' time column to datetime64[ns] with NumPy only.
+# The characters are read as a (rows, 12) code-point matrix and the fields are combined
+# arithmetically, without a Python call per row. A jump back of more than 12 hours is
+# treated as a midnight rollover and adds one day, so captures crossing midnight keep
+# increasing. Values that do not match the fixed layout fall back to pd.to_datetime.
+def parse_analyzer_times(values, rollover_threshold_ns=DAY_NS // 2):
+    values = np.asarray(values)
+    if values.dtype.kind == 'S':
+        chars = values.astype('S13').view(np.uint8).reshape(len(values), 13)
+    else:
+        chars = values.astype('U13').view(np.uint32).reshape(len(values), 13)
+
+    # Valid rows are exactly 12 characters: digits with ':' at positions 2, 5 and 8
+    valid = (chars[:, 2] == ord(':')) & (chars[:, 5] == ord(':')) & (chars[:, 8] == ord(':')) & (chars[:, 12] == 0)
+
+    def field(*positions):
+        value = np.zeros(len(values), dtype=np.int64)
+        for position in positions:
+            digit = chars[:, position].astype(np.int64) - ord('0')
+            valid[(digit < 0) | (digit > 9)] = False
+            value = value * 10 + digit
+        return value
+
+    hours, minutes, seconds, millis = field(0, 1), field(3, 4), field(6, 7), field(9, 10, 11)
+    valid &= (hours < 24) & (minutes < 60) & (seconds < 60)
+    time_ns = (((hours * 60 + minutes) * 60 + seconds) * 1000 + millis) * 1_000_000
+
+    # Rows with another layout (and not missing) are parsed the slow way
+    fallback = ~valid & ~pd.isna(values)
+    if fallback.any():
+        parsed = pd.to_datetime(pd.Series(values[fallback]), errors='coerce', format='%H:%M:%S:%f').astype('datetime64[ns]')
+        time_ns[fallback] = (parsed.to_numpy() - ANALYZER_BASE_DATE).astype(np.int64)
+        valid[fallback] = parsed.notna().to_numpy()
+
+    # Add one day at every midnight rollover
+    valid_ns = time_ns[valid]
+    rollovers = np.concatenate(([0], np.cumsum(np.diff(valid_ns) < -rollover_threshold_ns)))
+    time_ns[valid] = valid_ns + rollovers * DAY_NS
+
+    times = np.full(len(values), np.datetime64('NaT'), dtype='datetime64[ns]')
+    times[valid] = ANALYZER_BASE_DATE + time_ns[valid].astype('timedelta64[ns]')
+    return times
+
+# Read only the needed columns of the workbook, opening it once. openpyxl's read-only
+# mode streams the rows, so the other columns of large analyzer exports are never loaded.
+def read_columns_from_workbook(file_path, default_sheet, backup_sheet, column_to_keep):
+    workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        # Check available sheets
+        available_sheets = workbook.sheetnames
+        print(f"Available sheets in file: {available_sheets}")
+
+        # If Sheet5 is available, use it; otherwise, default to Sheet4
+        if backup_sheet in available_sheets:
+            sheet_to_use = backup_sheet
+            print(f"Sheet '{backup_sheet}' found, using it.")
+        elif default_sheet in available_sheets:
+            sheet_to_use = default_sheet
+            print(f"Sheet '{backup_sheet}' not found, using '{default_sheet}' instead.")
+        else:
+            # If neither sheet is found, raise an error
+            raise ValueError(f"Neither '{default_sheet}' nor '{backup_sheet}' found in the file. Available sheets: {available_sheets}")
+
+        rows = workbook[sheet_to_use].iter_rows(values_only=True)
+        columns = [str(name) if name is not None else '' for name in next(rows, ())]
+
+        # Print the column names to verify
+        print("Columns available in the file:", columns)
+
+        # Dynamically adjust the columns based on what exists
+        if 'DC Current' not in columns:
+            if 'DC Voltage' in columns:
+                print("Warning: Expected 'DC Current' column not found, using 'DC Voltage' instead.")
+                column_to_keep = ['Time', 'DC Voltage']  # Adjust columns if only 'DC Voltage' is present
+            else:
+                raise KeyError(f"Neither 'DC Current' nor 'DC Voltage' found in the file. Available columns: {columns}")
+        missing_columns = [column for column in column_to_keep if column not in columns]
+        if missing_columns:
+            raise KeyError(f"Columns {missing_columns} not found in the file. Available columns: {columns}")
+
+        # Keep only the relevant columns while streaming the rows
+        indexes = [columns.index(column) for column in column_to_keep]
+        values = {column: [] for column in column_to_keep}
+        for row in rows:
+            for column, index in zip(column_to_keep, indexes):
+                values[column].append(row[index] if index < len(row) else None)
+    finally:
+        workbook.close()
+
+    return pd.DataFrame(values), column_to_keep
+
+# Bumped whenever the cleaning changes, so older sidecars are not reused
+SIDECAR_VERSION = 2
+
+# Sidecar file holding the cleaned columns of a workbook as a NumPy structured array
+def get_sidecar_path(file_path, column):
+    return f"{file_path}.{column.replace(' ', '_')}.v{SIDECAR_VERSION}.npy"
+
+# Save the cleaned columns next to the workbook so later runs can memory-map them
+def save_sidecar(cleaned_data, sidecar_path):
+    value_column = cleaned_data.columns[1]
+    sidecar = np.empty(len(cleaned_data), dtype=[('Time', 'datetime64[ns]'), (value_column, 'float64')])
+    sidecar['Time'] = cleaned_data['Time'].to_numpy(dtype='datetime64[ns]')
+    sidecar[value_column] = cleaned_data[value_column].to_numpy(dtype='float64')
+    temp_path = f"{sidecar_path}.tmp.npy"
+    np.save(temp_path, sidecar)
+    os.replace(temp_path, sidecar_path)
+    print(f"Cleaned columns cached to: {sidecar_path}")
+
+# Load the cleaned columns from a sidecar, if it exists and is newer than the workbook
+def load_sidecar(file_path, sidecar_path):
+    if not os.path.exists(sidecar_path) or os.path.getmtime(sidecar_path) < os.path.getmtime(file_path):
+        return None
+    try:
+        sidecar = np.load(sidecar_path, mmap_mode='r')
+    except (OSError, ValueError) as e:
+        print(f"Ignoring unreadable cache file {sidecar_path}: {e}")
+        return None
+    print(f"Loading cached columns from: {sidecar_path}")
+    return pd.DataFrame({name: sidecar[name] for name in sidecar.dtype.names})
 
 # Load and clean data from Excel
 # Load and clean data from Excel with dynamic sheet selection
-def load_and_clean_data(file_path, default_sheet='Sheet4', backup_sheet='Sheet5', column_to_keep=['Time', 'DC Current']):
+# The cleaned 'Time' and value columns are cached in a '.npy' sidecar next to the workbook,
+# so later runs memory-map them instead of parsing the XLSX again.
+def load_and_clean_data(file_path, default_sheet='Sheet4', backup_sheet='Sheet5', column_to_keep=['Time', 'DC Current'], use_sidecar=True):
     print(f"Loading file: {file_path}")
 
-    # Check available sheets
-    available_sheets = pd.ExcelFile(file_path, engine='openpyxl').sheet_names
-    print(f"Available sheets in file: {available_sheets}")
-
-    # If Sheet5 is available, use it; otherwise, default to Sheet4
-    if backup_sheet in available_sheets:
-        sheet_to_use = backup_sheet
-        print(f"Sheet '{backup_sheet}' found, using it.")
-    elif default_sheet in available_sheets:
-        sheet_to_use = default_sheet
-        print(f"Sheet '{backup_sheet}' not found, using '{default_sheet}' instead.")
-    else:
-        # If neither sheet is found, raise an error
-        raise ValueError(f"Neither '{default_sheet}' nor '{backup_sheet}' found in the file. Available sheets: {available_sheets}")
-
-    # Load the Excel file from the appropriate sheet
-    data = pd.read_excel(file_path, sheet_name=sheet_to_use, engine='openpyxl')
+    sidecar_path = get_sidecar_path(file_path, column_to_keep[1])
+    if use_sidecar:
+        cleaned_data = load_sidecar(file_path, sidecar_path)
+        if cleaned_data is not None:
+            print(f"Data loaded and cleaned: {cleaned_data.shape[0]} rows")
+            return cleaned_data
 
-    # Print the column names to verify
-    print("Columns available in the file:", data.columns)
-
-    # Dynamically adjust the columns based on what exists
-    if 'DC Current' not in data.columns:
-        if 'DC Voltage' in data.columns:
-            print("Warning: Expected 'DC Current' column not found, using 'DC Voltage' instead.")
-            column_to_keep = ['Time', 'DC Voltage']  # Adjust columns if only 'DC Voltage' is present
-        else:
-            raise KeyError(f"Neither 'DC Current' nor 'DC Voltage' found in the file. Available columns: {data.columns}")
+    cleaned_data, column_to_keep = read_columns_from_workbook(file_path, default_sheet, backup_sheet, list(column_to_keep))
 
-    # Keep only the relevant columns
-    cleaned_data = data[column_to_keep].copy()
-
-    # Convert 'Time' column to datetime format
-    cleaned_data.loc[:, 'Time'] = pd.to_datetime(cleaned_data['Time'], errors='coerce', format='%H:%M:%S:%f')
+    # Convert 'Time' column to a datetime64[ns] column once, at load time
+    cleaned_data['Time'] = parse_analyzer_times(cleaned_data['Time'].to_numpy())
+    cleaned_data[column_to_keep[1]] = pd.to_numeric(cleaned_data[column_to_keep[1]], errors='coerce')
 
     # Drop rows where Time or the key column is NaN
     cleaned_data = cleaned_data.dropna(subset=['Time', column_to_keep[1]])
 
+    if use_sidecar:
+        save_sidecar(cleaned_data, sidecar_path)
+
     print(f"Data loaded and cleaned: {cleaned_data.shape[0]} rows")
     return cleaned_data
 
-# Function to detect outliers in DC Current and Voltage using the interquartile range (IQR)
+# Function to detect outliers in DC Current and Voltage using the interquartile range (IQR).
+# Both channels are handled in one pass (see outlierStats.py); the outliers are returned as
+# positional index arrays per channel instead of copies of the rows.
 def detect_outliers(merged_data):
     print("Detecting outliers in DC Current and DC Voltage...")
-    
-    outliers = {}
-    
-    # Define a function to compute IQR and detect outliers
-    def find_outliers(data, column):
-        Q1 = data[column].quantile(0.25)
-        Q3 = data[column].quantile(0.75)
-        IQR = Q3 - Q1
-        lower_bound = Q1 - 1.5 * IQR
-        upper_bound = Q3 + 1.5 * IQR
-        return data[(data[column] < lower_bound) | (data[column] > upper_bound)]
-
-    outliers['DC Current'] = find_outliers(merged_data, 'DC Current')
-    outliers['DC Voltage'] = find_outliers(merged_data, 'DC Voltage')
-
-    total_outliers = len(outliers['DC Current']) + len(outliers['DC Voltage'])
+
+    stats = outlier_stats(merged_data[list(OUTLIER_COLUMNS)].to_numpy(dtype=np.float64))
+    outliers = {column: stats[column]['indices'] for column in OUTLIER_COLUMNS}
+
+    total_outliers = sum(stats[column]['count'] for column in OUTLIER_COLUMNS)
     print(f"Total outliers found: {total_outliers}")
 
     return outliers
 
-# Plot DC Current and DC Voltage over time and save the plot
-def plot_dc_current_and_voltage(merged_data, plot_dir):
-    print("Plotting DC Current and DC Voltage over Time...")
-    fig, ax1 = plt.subplots(figsize=(12, 6))
-
-    # Plot DC Voltage on the primary y-axis
-    ax1.set_xlabel('Time', fontsize=14)
-    ax1.set_ylabel('DC Voltage (V)', color='green', fontsize=14)
-    ax1.plot(merged_data['Time'], merged_data['DC Voltage'], color='green', label='DC Voltage')
-    ax1.tick_params(axis='y', labelcolor='green')
-
-    # Create a secondary y-axis for DC Current
-    ax2 = ax1.twinx()
-    ax2.set_ylabel('DC Current (A)', color='blue', fontsize=14)
-    ax2.plot(merged_data['Time'], merged_data['DC Current'], color='blue', label='DC Current')
-    ax2.tick_params(axis='y', labelcolor='blue')
-
-    plt.title('DC Current and DC Voltage Over Time', fontsize=16)
-    fig.tight_layout()
-    plt.grid(True)
-    
-    # Save the plot as an image
-    plot_file = os.path.join(plot_dir, 'current_voltage_plot.png')
-    plt.savefig(plot_file)  # Save the plot as a PNG file
-    plt.close()  # Close the plot to free memory
-    print(f"DC Current and Voltage plot saved to: {plot_file}")
-
-# Calculate power in watts and save the plot
-def calculate_power(merged_data, plot_dir):
-    print("Calculating Power (W)...")
-    # Multiply DC Current and DC Voltage to get power in Watts (W)
-    merged_data['Power (W)'] = merged_data['DC Current'] * merged_data['DC Voltage']
-
-    plt.figure(figsize=(12, 6))
-    plt.plot(merged_data['Time'], merged_data['Power (W)'], color='purple', label='Power (W)')
-    plt.title('Power (W) Over Time', fontsize=16)
-    plt.xlabel('Time', fontsize=14)
-    plt.ylabel('Power (W)', fontsize=14)
-    plt.grid(True)
-    
-    # Save the plot as an image
-    plot_file = os.path.join(plot_dir, 'power_plot.png')
-    plt.savefig(plot_file)  # Save the plot as a PNG file
-    plt.close()  # Close the plot
-    print(f"Power plot saved to: {plot_file}")
+# Render the current/voltage, power and energy plots, one worker process per figure.
+# Each series is min/max decimated to the figure width first (see energyPlots.py), so
+# the plotting time depends on the image resolution rather than the number of rows.
+def render_energy_plots(merged_data, plot_dir, workers=DEFAULT_PLOT_WORKERS):
+    print(f"Rendering plots with {workers} worker(s)...")
+    time = merged_data['Time'].to_numpy()
+    current_voltage_file = os.path.join(plot_dir, 'current_voltage_plot.png')
+    power_file = os.path.join(plot_dir, 'power_plot.png')
+    energy_file = os.path.join(plot_dir, 'energy_consumption_plot.png')
+
+    current_time, current = decimate_for_figure(time, merged_data['DC Current'].to_numpy(), 12)
+    voltage_time, voltage = decimate_for_figure(time, merged_data['DC Voltage'].to_numpy(), 12)
+    jobs = [
+        (render_current_voltage_plot, (current_time, current, voltage_time, voltage, current_voltage_file)),
+        (render_power_plot, (*decimate_for_figure(time, merged_data['Power (W)'].to_numpy(), 12), power_file)),
+        (render_energy_plot, (*decimate_for_figure(time, merged_data['Energy (Wh)'].to_numpy(), 10), energy_file))
+    ]
+    render_plots(jobs, workers)
+
+    print(f"DC Current and Voltage plot saved to: {current_voltage_file}")
+    print(f"Power plot saved to: {power_file}")
+    print(f"Energy plot saved to: {energy_file}")
 
 # Apply forward and backward filling to handle remaining NaN values
 def fill_missing_values(data, column):
     # First, apply forward fill
-    data[column] = data[column].fillna(method='ffill')
+    data[column] = data[column].ffill()
     # Then, apply backward fill for any remaining NaN values
-    data[column] = data[column].fillna(method='bfill')
+    data[column] = data[column].bfill()
     
     return data
 
-def calculate_total_energy(merged_data, plot_dir):
-    print("Calculating total energy consumption in Wh...")
+# Align the current and voltage streams on time with a sorted as-of merge (pd.merge_asof),
+# which walks both sorted columns once. Without a grid every current sample is kept and gets
+# the nearest voltage sample within tolerance_ms. With grid_ms (e.g. 1 or 10) both streams
+# are resampled to a regular grid over their common time range instead. Samples without a
+# partner within the tolerance are left as NaN for fill_missing_values.
+def align_current_and_voltage(current_data, voltage_data, tolerance_ms=DEFAULT_ALIGN_TOLERANCE_MS, grid_ms=None):
+    print(f"Aligning DC Current and DC Voltage (tolerance {tolerance_ms} ms, grid {grid_ms or 'none'})...")
+    tolerance = pd.Timedelta(milliseconds=tolerance_ms)
+    current_data = current_data.sort_values('Time', kind='stable', ignore_index=True)
+    voltage_data = voltage_data.sort_values('Time', kind='stable', ignore_index=True)
+
+    if grid_ms is None:
+        aligned = current_data
+    else:
+        start = max(current_data['Time'].iloc[0], voltage_data['Time'].iloc[0])
+        end = min(current_data['Time'].iloc[-1], voltage_data['Time'].iloc[-1])
+        grid = np.arange(start.to_datetime64(), end.to_datetime64() + 1, np.timedelta64(grid_ms, 'ms'), dtype='datetime64[ns]')
+        aligned = pd.merge_asof(pd.DataFrame({'Time': grid}), current_data, on='Time', direction='nearest', tolerance=tolerance)
+
+    aligned = pd.merge_asof(aligned, voltage_data, on='Time', direction='nearest', tolerance=tolerance)
+    print(f"Aligned rows: {aligned.shape[0]}, without a voltage match: {aligned['DC Voltage'].isna().sum()}")
+    return aligned
+
+# Calculate the energy in Wh with the chunked integrator (see energyIntegrator.py). Power,
+# delta time, energy and the cumulative energy are written chunk_rows rows at a time into
+# preallocated float64 buffers, without full-length temporaries. The cumulative buffer is
+# returned as an EnergyIndex, which answers the energy of any (t0, t1) in O(log n).
+# Also returns energy_data: the columns of merged_data plus 'Power (W)', 'Delta Time (h)' and
+# 'Energy (Wh)', built around the buffers themselves (assigning them as new columns of
+# merged_data would copy each of them), for the plots and the merged data file.
+def calculate_total_energy(merged_data, method='rectangle', chunk_rows=DEFAULT_CHUNK_ROWS):
+    print(f"Calculating total energy consumption in Wh ({method} method)...")
     if not pd.api.types.is_datetime64_any_dtype(merged_data['Time']):
         merged_data['Time'] = pd.to_datetime(merged_data['Time'], errors='coerce')
 
-    # Calculate the time delta in hours between consecutive measurements
-    merged_data['Delta Time (h)'] = (merged_data['Time'] - merged_data['Time'].shift()).dt.total_seconds() / 3600
-
-    # Safely fill missing Delta Time values with 0
-    merged_data['Delta Time (h)'] = merged_data['Delta Time (h)'].fillna(0)
+    integrator, buffers, energy_index = integrate_arrays(merged_data['Time'].to_numpy(), merged_data['DC Current'].to_numpy(),
+                                                         merged_data['DC Voltage'].to_numpy(), method, chunk_rows)
+    energy_data = pd.DataFrame({
+        **{column: merged_data[column].to_numpy() for column in merged_data.columns},
+        'Power (W)': buffers['power'],
+        'Delta Time (h)': buffers['delta_h'],
+        'Energy (Wh)': buffers['energy_wh']
+    }, index=merged_data.index, copy=False)
 
-    # Calculate energy in Wh by multiplying Power (W) with Delta Time (h)
-    merged_data['Energy (Wh)'] = merged_data['Power (W)'] * merged_data['Delta Time (h)']
-    
-    total_energy_Wh = merged_data['Energy (Wh)'].sum()
+    total_energy_Wh = integrator.total_wh
     print(f"Total Energy Consumption for the whole file: {total_energy_Wh} Wh")
+    return total_energy_Wh, merged_data.shape[0], integrator.chunk_stats, energy_index, energy_data
+
+# Save the per-chunk energy statistics to a CSV file
+def save_chunk_statistics(chunk_stats, output_file='energy_chunk_stats.csv'):
+    print(f"Saving per-chunk energy statistics to {output_file}...")
+    try:
+        pd.DataFrame(chunk_stats).to_csv(output_file, index=False)
+        print(f"Per-chunk statistics successfully saved to {output_file}")
+    except Exception as e:
+        print(f"Failed to save per-chunk statistics. Error: {e}")
+
+# Attribute the energy of the capture to the phases between the events of a meter log
+# (see energyAttribution.py) and save the per-cycle, per-phase table. The log's time of
+# day is put on the capture's clock; clock_offset_ms corrects a known skew between them.
+def save_phase_energy(energy_index, log_file, output_file=PHASE_ENERGY_FILE, clock_offset_ms=0):
+    print(f"Attributing energy to the events of {log_file}...")
+    try:
+        events = extract_log_events(log_file)
+        if events is None:
+            return None
+        event_times = ANALYZER_BASE_DATE + (events.timestamp_ms + clock_offset_ms).astype('timedelta64[ms]')
+        phase_energy = summarize_phase_energy(attribute_energy_to_events(energy_index, events, event_times))
+        phase_energy.to_csv(output_file, index=False)
+        print(f"Energy per phase for {phase_energy['Wake Cycle'].nunique()} wake cycles saved to: {output_file}")
+        return phase_energy
+    except Exception as e:
+        print(f"Failed to attribute energy to the log events. Error: {e}")
+        return None
 
-    # Plot energy over time
-    plt.figure(figsize=(10, 6))
-    plt.plot(merged_data['Time'], merged_data['Energy (Wh)'], color='purple')
-    plt.title('Time vs Energy Consumption (Wh)', fontsize=16)
-    plt.xlabel('Time', fontsize=14)
-    plt.ylabel('Energy (Wh)', fontsize=14)
-    plt.grid(True)
-
-    # Save the energy consumption plot as an image
-    plot_file = os.path.join(plot_dir, 'energy_consumption_plot.png')
-    plt.savefig(plot_file)  # Save the plot as a PNG file
-    plt.close()  # Close the plot
-    print(f"Energy plot saved to: {plot_file}")
-    return total_energy_Wh, merged_data.shape[0]
-
-# Save the merged data to an Excel file
-def save_merged_data_to_excel(merged_data, output_file='merged_current_voltage_data.xlsx'):
-    print(f"Saving merged data to {output_file}...")
+# Save the merged data with the writer chosen by output_format ('auto', 'xlsx', 'csv' or
+# 'parquet'); 'auto' keeps XLSX for small captures. Returns the written file.
+def save_merged_data(merged_data, output_base='merged_current_voltage_data', output_format='auto'):
+    print(f"Saving merged data to {output_base} ({output_format})...")
     try:
-        # Ensure that Delta Time and Energy columns are included
-        merged_data.to_excel(output_file, index=False, engine='openpyxl')
-        print(f"Merged data successfully saved to {output_file}")
+        report = write_merged_data(merged_data, output_base, output_format)
+        print(f"Merged data successfully saved to {report['file']}")
+        return report['file']
     except Exception as e:
-        print(f"Failed to save merged data to {output_file}. Error: {e}")
+        print(f"Failed to save merged data to {output_base}. Error: {e}")
+        return None
 
 # Find the current and voltage files in the specified directory
 def find_files_in_directory(directory):
     current_file = None
     voltage_file = None
 
-    # Scan the directory for Excel files
-    for filename in os.listdir(directory):
-        if filename.endswith(".xlsx"):
+    # Scan the directory for Excel files, skipping our own output and Excel lock files
+    for filename in sorted(os.listdir(directory)):
+        if filename.endswith(".xlsx") and not filename.startswith((MERGED_OUTPUT_NAME, '~$')):
             file_path = os.path.join(directory, filename)
             if 'current' in filename.lower():
                 current_file = file_path
@@ -186,31 +339,6 @@ def find_files_in_directory(directory):
 
     return current_file, voltage_file
 
-# Function to detect outliers in DC Current and Voltage using the interquartile range (IQR)
-def detect_outliers(merged_data):
-    print("Detecting outliers in DC Current and DC Voltage...")
-    
-    outliers = {}
-    
-    # Define a function to compute IQR and detect outliers
-    def find_outliers(data, column):
-        Q1 = data[column].quantile(0.25)
-        Q3 = data[column].quantile(0.75)
-        IQR = Q3 - Q1
-        lower_bound = Q1 - 1.5 * IQR
-        upper_bound = Q3 + 1.5 * IQR
-        return data[(data[column] < lower_bound) | (data[column] > upper_bound)]
-
-    # Detect outliers in 'DC Current' and 'DC Voltage' columns
-    outliers['DC Current'] = find_outliers(merged_data, 'DC Current')
-    outliers['DC Voltage'] = find_outliers(merged_data, 'DC Voltage')
-
-    # Print out the total number of outliers detected
-    total_outliers = len(outliers['DC Current']) + len(outliers['DC Voltage'])
-    print(f"Total outliers found: {total_outliers}")
-
-    return outliers
-  
 # Function to save statistics to a file
 def save_statistics(total_energy_Wh, num_merged_rows, outliers, output_file='energy_stats.txt'):
     print(f"Saving statistics to {output_file}...")
@@ -226,33 +354,22 @@ def save_statistics(total_energy_Wh, num_merged_rows, outliers, output_file='ene
     except Exception as e:
         print(f"Failed to save statistics. Error: {e}")
 
-# Main function to run the steps
-def main():
-    dir_path = input("Please enter the directory path where the DC Current and DC Voltage files are located: ")
-
-    while not os.path.isdir(dir_path):
-        print(f"The directory '{dir_path}' does not exist. Please try again.")
-        dir_path = input("Please enter the directory path where the DC Current and DC Voltage files are located: ")
-
-    current_file, voltage_file = find_files_in_directory(dir_path)
-
-    if not current_file or not voltage_file:
-        print("Could not find both the DC Current and DC Voltage files in the directory.")
-        return
-
+# Run the whole analysis for one directory holding a current and a voltage workbook and
+# return its statistics (total energy, merged rows, outlier counts and output file)
+def analyze_directory(dir_path, current_file, voltage_file, energy_method='rectangle', tolerance_ms=DEFAULT_ALIGN_TOLERANCE_MS,
+                      grid_ms=None, plot_workers=DEFAULT_PLOT_WORKERS, output_format='auto', log_file=None, clock_offset_ms=0):
     print(f"DC Current file: {current_file}")
     print(f"DC Voltage file: {voltage_file}")
 
     current_data = load_and_clean_data(current_file, column_to_keep=['Time', 'DC Current'])
     voltage_data = load_and_clean_data(voltage_file, column_to_keep=['Time', 'DC Voltage'])
 
-    merged_data = pd.merge(current_data, voltage_data, on='Time', how='inner')
-
-    # Interpolate missing values in the DC Voltage column
-    merged_data['DC Voltage'] = merged_data['DC Voltage'].interpolate(method='polynomial', order=2)
+    merged_data = align_current_and_voltage(current_data, voltage_data, tolerance_ms, grid_ms)
 
-    # Apply forward and backward filling to handle remaining NaN values
+    # Apply forward and backward filling to the samples without a match within the tolerance
     merged_data = fill_missing_values(merged_data, 'DC Voltage')
+    if grid_ms is not None:
+        merged_data = fill_missing_values(merged_data, 'DC Current')
 
     # Optionally, drop any rows that still have NaN values
     merged_data = merged_data.dropna()
@@ -262,14 +379,13 @@ def main():
     if not os.path.exists(plot_dir):
         os.makedirs(plot_dir)
 
-    # Plot DC Current and DC Voltage and save the plot
-    plot_dc_current_and_voltage(merged_data, plot_dir)
+    # Calculate power and total energy, return total energy, number of merged rows, per-chunk stats,
+    # the energy index and the merged data with the power and energy columns
+    total_energy_Wh, num_merged_rows, chunk_stats, energy_index, merged_data = calculate_total_energy(merged_data,
+                                                                                                     energy_method)
 
-    # Calculate power and save the plot
-    calculate_power(merged_data, plot_dir)
-
-    # Calculate total energy and save the plot, return total energy and number of merged rows
-    total_energy_Wh, num_merged_rows = calculate_total_energy(merged_data, plot_dir)
+    # Render the DC Current and DC Voltage, power and energy plots in parallel
+    render_energy_plots(merged_data, plot_dir, plot_workers)
 
     # Detect outliers
     outliers = detect_outliers(merged_data)
@@ -277,12 +393,107 @@ def main():
     # Save the statistics, including total energy, merged rows, and outlier information
     stats_file = os.path.join(dir_path, 'energy_stats.txt')
     save_statistics(total_energy_Wh, num_merged_rows, outliers, stats_file)
+    save_chunk_statistics(chunk_stats, os.path.join(dir_path, 'energy_chunk_stats.csv'))
+
+    # Attribute the energy to the phases of the meter log, if the directory has one
+    if log_file:
+        save_phase_energy(energy_index, log_file, os.path.join(dir_path, PHASE_ENERGY_FILE), clock_offset_ms)
 
     # Save merged data with Energy (Wh) and Delta Time (h)
-    output_file = os.path.join(dir_path, 'merged_current_voltage_data.xlsx')
-    save_merged_data_to_excel(merged_data, output_file)
+    output_base = os.path.join(dir_path, MERGED_OUTPUT_NAME)
+    output_file = save_merged_data(merged_data, output_base, output_format)
 
+    return {
+        'Total Energy (Wh)': total_energy_Wh,
+        'Merged Rows': num_merged_rows,
+        'Outliers in DC Current': len(outliers['DC Current']),
+        'Outliers in DC Voltage': len(outliers['DC Voltage']),
+        'Output File': output_file
+    }
+
+# Main function to run the steps
+def main(energy_method='rectangle', tolerance_ms=DEFAULT_ALIGN_TOLERANCE_MS, grid_ms=None, plot_workers=DEFAULT_PLOT_WORKERS,
+         output_format='auto'):
+    dir_path = input("Please enter the directory path where the DC Current and DC Voltage files are located: ")
+
+    while not os.path.isdir(dir_path):
+        print(f"The directory '{dir_path}' does not exist. Please try again.")
+        dir_path = input("Please enter the directory path where the DC Current and DC Voltage files are located: ")
+
+    current_file, voltage_file = find_files_in_directory(dir_path)
+
+    if not current_file or not voltage_file:
+        print("Could not find both the DC Current and DC Voltage files in the directory.")
+        return
+
+    analyze_directory(dir_path, current_file, voltage_file, energy_method, tolerance_ms, grid_ms, plot_workers, output_format,
+                      find_log_file(dir_path))
+
+# Find the meter log (.txt) in the specified directory, skipping our own statistics file
+def find_log_file(directory):
+    log_files = sorted(filename for filename in os.listdir(directory)
+                       if is_log_file_name(filename) and filename != 'energy_stats.txt')
+    if len(log_files) > 1:
+        print(f"Several logs found in {directory}, using {log_files[0]}")
+    return os.path.join(directory, log_files[0]) if log_files else None
+
+# Find every directory under root_folder that holds both a current and a voltage workbook
+def find_capture_directories(root_folder):
+    capture_directories = []
+    for dir_path, dir_names, _ in os.walk(root_folder):
+        dir_names[:] = sorted(name for name in dir_names if name != 'plots')
+        current_file, voltage_file = find_files_in_directory(dir_path)
+        if current_file and voltage_file:
+            capture_directories.append((dir_path, current_file, voltage_file))
+    return capture_directories
+
+# Run analyze_directory in a worker; an error is returned as part of the row instead of
+# being raised, so one broken capture does not stop the rest of the batch
+def analyze_directory_safely(capture, options):
+    dir_path, current_file, voltage_file = capture
+    row = {'Folder': dir_path, 'Current File': os.path.basename(current_file), 'Voltage File': os.path.basename(voltage_file)}
+    try:
+        row.update(analyze_directory(dir_path, current_file, voltage_file, log_file=find_log_file(dir_path), **options))
+        row['Error'] = ''
+    except Exception as e:
+        print(f"Failed to analyze {dir_path}. Error: {e}")
+        row['Error'] = f"{type(e).__name__}: {e}"
+    return row
+
+# Non-interactive batch mode: analyze every capture directory under root_folder on a
+# process pool and write one consolidated table (BATCH_STATS_FILE) into root_folder.
+# Each worker renders its plots serially, so the pool size is the only parallelism.
+def batch_main(root_folder, workers=os.cpu_count(), energy_method='rectangle', tolerance_ms=DEFAULT_ALIGN_TOLERANCE_MS,
+               grid_ms=None, output_format='auto'):
+    captures = find_capture_directories(root_folder)
+    print(f"Found {len(captures)} capture directories under {root_folder}")
+    if not captures:
+        return None
+
+    options = {'energy_method': energy_method, 'tolerance_ms': tolerance_ms, 'grid_ms': grid_ms,
+               'plot_workers': 1, 'output_format': output_format}
+    if workers <= 1:
+        rows = [analyze_directory_safely(capture, options) for capture in captures]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            rows = list(executor.map(analyze_directory_safely, captures, repeat(options)))
+
+    batch_stats = pd.DataFrame(rows, columns=BATCH_STATS_COLUMNS)
+    # Keep the counts as integers even when failed directories leave them empty
+    count_columns = ['Merged Rows', 'Outliers in DC Current', 'Outliers in DC Voltage']
+    batch_stats[count_columns] = batch_stats[count_columns].astype('Int64')
+    stats_file = os.path.join(root_folder, BATCH_STATS_FILE)
+    batch_stats.to_csv(stats_file, index=False)
+    failed = (batch_stats['Error'] != '').sum()
+    print(f"Batch statistics for {len(rows)} directories ({failed} failed) saved to: {stats_file}")
+    return batch_stats
+
+# With a root folder argument the script runs in batch mode, otherwise it prompts for one directory:
+#   python px2energyAnalysis.py [root_folder [workers]]
 if __name__ == '__main__':
-    main()
+    if len(sys.argv) > 1:
+        batch_main(sys.argv[1], int(sys.argv[2]) if len(sys.argv) > 2 else os.cpu_count())
+    else:
+        main()
 
 #examples more 
\ No newline at end of file